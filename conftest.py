@@ -0,0 +1,3 @@
+"""
+Pytest root of pycomic program, makes pycomic_pkg importable from tests
+"""
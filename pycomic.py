@@ -80,6 +80,8 @@ def _comic999_action():
         comic999.add(pyconfig)
     elif sys.argv[1] == 'convert-image':
         comic999.convert_image(pyconfig)
+    elif sys.argv[1] == 'dedup':
+        comic999.dedup(pyconfig)
     elif sys.argv[1] == 'download':
         comic999.download(pyconfig)
     elif sys.argv[1] == 'error-url':
@@ -102,6 +104,10 @@ def _comic999_action():
         comic999.list_url(pyconfig)
     elif sys.argv[1] == 'make-pdf':
         comic999.make_pdf(pyconfig)
+    elif sys.argv[1] == 'queue':
+        comic999.queue(pyconfig)
+    elif sys.argv[1] == 'rename-pages':
+        comic999.rename_pages(pyconfig)
     elif sys.argv[1] == 'source':
         comic999.source(pyconfig)
     elif sys.argv[1] == 'state-change':
@@ -124,6 +130,8 @@ def _manhuagui_action():
         manhuagui.add(pyconfig)
     elif sys.argv[1] == 'convert-image':
         manhuagui.convert_image(pyconfig)
+    elif sys.argv[1] == 'dedup':
+        manhuagui.dedup(pyconfig)
     elif sys.argv[1] == 'download':
         manhuagui.download(pyconfig)
     elif sys.argv[1] == 'error-url':
@@ -144,6 +152,10 @@ def _manhuagui_action():
         manhuagui.list_url(pyconfig)
     elif sys.argv[1] == 'make-pdf':
         manhuagui.make_pdf(pyconfig)
+    elif sys.argv[1] == 'queue':
+        manhuagui.queue(pyconfig)
+    elif sys.argv[1] == 'rename-pages':
+        manhuagui.rename_pages(pyconfig)
     elif sys.argv[1] == 'source':
         manhuagui.source(pyconfig)
     elif sys.argv[1] == 'state-change':
@@ -169,6 +181,8 @@ def _file_action():
         comic_file.add(pyconfig)
     elif sys.argv[1] == 'convert':
         comic_file.convert(pyconfig)
+    elif sys.argv[1] == 'dedup':
+        comic_file.dedup(pyconfig)
     elif sys.argv[1] == 'download':
         comic_file.download(pyconfig)
     elif sys.argv[1] == 'list':
@@ -181,6 +195,8 @@ def _file_action():
         comic_file.list_url(pyconfig)
     elif sys.argv[1] == 'make-pdf':
         comic_file.make_pdf(pyconfig)
+    elif sys.argv[1] == 'rename-pages':
+        comic_file.rename_pages(pyconfig)
     elif sys.argv[1] == 'source':
         comic_file.source(pyconfig)
     elif sys.argv[1] == 'state-change':
@@ -0,0 +1,80 @@
+"""
+Program:
+    Bandwidth limiter for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    With coordination file, budget is shared by every pycomic process on the host:
+    file keeps the time when bytes sent so far are paid off, updated under fcntl lock
+"""
+
+import os, struct
+import fcntl
+import time, asyncio
+
+from pycomic_pkg import rate_limit_class as ratecl
+
+
+class BandwidthLimiter():
+
+    def __init__(self, rate=0, path=None, burst=1):
+        """
+        Input:
+            rate - Bytes per second, 0 for unlimited
+            path - Coordination file shared by processes, None to limit this process only
+            burst - Seconds of budget allowed at once
+        """
+        self.rate = float(rate)
+        self.path = path
+        self.burst = burst
+        self._bucket = ratecl.TokenBucket(self.rate, self.rate * burst)
+
+    def reserve(self, size):
+        """
+        Take size bytes from budget
+
+        Return:
+            Seconds to wait before size bytes can be read
+        """
+        if self.rate <= 0:
+            return 0
+        if not self.path:
+            return self._bucket.reserve(size)
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            data = os.pread(fd, 8, 0)
+            paid = struct.unpack('d', data)[0] if len(data) == 8 else 0
+
+            now = time.time()
+            paid = max(paid, now) + size / self.rate
+            os.pwrite(fd, struct.pack('d', paid), 0)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+        return max(paid - now - self.burst, 0)
+
+    def throttle(self, size):
+        """
+        Block until size bytes are within budget
+        """
+        wait = self.reserve(size)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def throttle_async(self, size):
+        """
+        Asyncio counterpart of throttle
+        Coordination file lock may be held by other process, it is taken in executor thread
+        so other coroutines keep running
+        """
+        if self.path and self.rate > 0:
+            wait = await asyncio.get_running_loop().run_in_executor(None, self.reserve, size)
+        else:
+            wait = self.reserve(size)
+        if wait > 0:
+            await asyncio.sleep(wait)
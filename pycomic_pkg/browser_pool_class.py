@@ -0,0 +1,203 @@
+"""
+Program:
+    Selenium browser pool for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Browsers are started on first demand up to pool size and handed out again after reset,
+    every browser is quit (not only its window closed) when pool is closed or program exits,
+    so no chromedriver process is left behind
+"""
+
+import atexit
+import threading
+import contextlib
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+
+class BrowserPool():
+
+    def __init__(self, size=1, headless=True, network_log=False):
+        """
+        Input:
+            size - Maximum browsers running at once
+            headless - Run browsers without window
+            network_log - Record network events to performance log, read by network_log_class
+        """
+        self.size = max(size, 1)
+        self.headless = headless
+        self.network_log = network_log
+        self._condition = threading.Condition()
+        self._idle = []
+        self._browsers = set()
+        self._starting = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    def acquire(self):
+        """
+        Take idle browser, start one if pool is not full
+        Block until a browser is released otherwise
+
+        Return:
+            selenium WebDriver object
+        Error:
+            RuntimeError - Pool already closed
+            WebDriverException - Failed to start browser
+        """
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError('Browser pool closed')
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._browsers) + self._starting < self.size:
+                    self._starting += 1
+                    break
+                self._condition.wait()
+
+        # Start browser outside of lock, it takes seconds
+        try:
+            driver = self._launch()
+        except Exception:
+            with self._condition:
+                self._starting -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._starting -= 1
+            closed = self._closed
+            if not closed:
+                self._browsers.add(driver)
+        if closed:
+            _quit(driver)
+            raise RuntimeError('Browser pool closed')
+        return driver
+
+    def release(self, driver):
+        """
+        Reset browser state and return it to pool
+        Browser failing to reset is quit and replaced on next acquire
+        """
+        try:
+            for handle in driver.window_handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+            driver.delete_all_cookies()
+            driver.get('about:blank')
+            if self.network_log:
+                # Drop log of previous user
+                driver.get_log('performance')
+        except WebDriverException:
+            self.discard(driver)
+            return
+
+        with self._condition:
+            if driver in self._browsers:
+                self._idle.append(driver)
+                self._condition.notify()
+                return
+        # Pool closed while browser was in use
+        _quit(driver)
+
+    def discard(self, driver):
+        """
+        Quit broken browser and free its place in pool
+        """
+        _quit(driver)
+        with self._condition:
+            self._browsers.discard(driver)
+            self._condition.notify()
+
+    @contextlib.contextmanager
+    def browser(self):
+        """
+        Borrow browser for with block
+        """
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """
+        Quit every browser of pool, including browsers still in use
+        """
+        with self._condition:
+            self._closed = True
+            browsers, self._browsers, self._idle = self._browsers, set(), []
+            self._condition.notify_all()
+
+        for driver in browsers:
+            _quit(driver)
+
+    def _launch(self):
+        """
+        Start chrome browser
+        """
+        options = Options()
+        options.set_headless(self.headless)
+        capabilities = options.to_capabilities()
+        if self.network_log:
+            # Key name differs between chromedriver versions
+            capabilities['goog:loggingPrefs'] = {'performance': 'ALL'}
+            capabilities['loggingPrefs'] = {'performance': 'ALL'}
+        return webdriver.Chrome(desired_capabilities=capabilities)
+
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool(size=1, headless=True, network_log=False):
+    """
+    Shared browser pool of this process, one for each headless and network_log mode
+    Pool is closed at program exit
+
+    Parameter:
+        size - Pool size, used when pool is created
+    Return:
+        BrowserPool object
+    """
+    with _pools_lock:
+        if (headless, network_log) not in _pools:
+            _pools[(headless, network_log)] = BrowserPool(size, headless, network_log)
+        return _pools[(headless, network_log)]
+
+
+@atexit.register
+def close():
+    """
+    Close every shared pool
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for browser_pool in pools:
+        browser_pool.close()
+
+
+def _quit(driver):
+    """
+    Quit browser and its chromedriver process, ignore browser already gone
+    """
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
@@ -0,0 +1,76 @@
+"""
+Program:
+    Browserless 999comics chapter decoder for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Chapter page carries page list in script, either
+    packed image data of manhuagui family (see manhuagui_decoder),
+    or variables: var chapterImages = [...]; var chapterPath = "...";
+    Run as script to compare decoded urls with links csv file harvested by browser:
+        python -m pycomic_pkg.comic999_decoder CHAPTER_HTML LINKS_CSV [HOST]
+"""
+
+import re, json
+import csv, sys
+
+from urllib.parse import quote, urljoin
+
+from pycomic_pkg import exceptions as pycomic_err
+from pycomic_pkg import manhuagui_decoder as mhgdecoder
+
+
+_CHAPTER_IMAGES = re.compile(r'chapterImages\s*=\s*(\[.*?\])\s*;', re.S)
+_CHAPTER_PATH = re.compile(r'chapterPath\s*=\s*["\']([^"\']*)["\']')
+
+
+def chapter_urls(html, host):
+    """
+    Decode image urls of 999comics chapter page
+
+    Parameters:
+        html - Chapter page source
+        host - Image host url, e.g. https://www.999comics.com
+    Return:
+        List of image urls in page order
+    Error:
+        pycomic_err.DecodeError - Page has no decodable page list
+    """
+    if mhgdecoder.has_packed_script(html):
+        return mhgdecoder.chapter_urls(html, host.split('://')[-1].rstrip('/'))
+
+    images_match = _CHAPTER_IMAGES.search(html)
+    if images_match is None:
+        raise pycomic_err.DecodeError('Page list not found')
+    try:
+        images = json.loads(images_match.group(1))
+    except ValueError as err:
+        raise pycomic_err.DecodeError('Page list not valid: {}'.format(err))
+    if not images:
+        raise pycomic_err.DecodeError('Page list is empty')
+
+    path_match = _CHAPTER_PATH.search(html)
+    base = urljoin(host.rstrip('/') + '/', path_match.group(1) if path_match else '')
+
+    return [image if image.startswith('http') else urljoin(base, quote(image, safe='/:?=&%'))
+            for image in images]
+
+
+
+if __name__ == '__main__':
+
+    # Compare decoded urls with links csv file written by browser harvest
+    html_path, links_path = sys.argv[1], sys.argv[2]
+    host = sys.argv[3] if len(sys.argv) > 3 else 'https://www.999comics.com'
+
+    with open(html_path, mode='rt', encoding='utf-8') as file:
+        decoded = chapter_urls(file.read(), host)
+    with open(links_path, mode='rt', encoding='utf-8') as file:
+        harvested = [row[1] for row in csv.reader(file)]
+
+    for index, (decoded_url, harvested_url) in enumerate(zip(decoded, harvested)):
+        if decoded_url != harvested_url:
+            print('Page {} differs\n  decoded   {}\n  harvested {}'.format(index, decoded_url, harvested_url))
+    print('Decoded {} pages, harvested {} pages'.format(len(decoded), len(harvested)))
@@ -62,6 +62,13 @@ class TXTError(pycomicError):
     pass
 
 
+class DecodeError(pycomicError):
+    """
+    Raise when failed to decode image data of comic page
+    """
+    pass
+
+
 # class DriverError(pycomicError):
 #     """
 #     Raise when exception happened on selenium driver
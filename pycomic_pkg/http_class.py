@@ -0,0 +1,157 @@
+"""
+Program:
+    Shared HTTP client for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Keep-alive connection pools are kept per host inside one session,
+    every request of pycomic should go through client()
+"""
+
+import threading
+import http.cookies
+
+import requests
+import aiohttp
+import yarl
+
+from requests.adapters import HTTPAdapter
+
+
+class HTTPClient():
+
+    def __init__(self, headers=None, pool_size=10, connect_timeout=10, read_timeout=30):
+        """
+        Input:
+            headers - Default headers of every request
+            pool_size - Maximum keep-alive connections to each host
+            connect_timeout - Seconds to wait for connection
+            read_timeout - Seconds to wait between bytes from server
+        """
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(self, url, headers=None, **kwargs):
+        """
+        Send GET request through shared session
+
+        Return:
+            requests.Response object
+        Error:
+            requests.exceptions.RequestException - Request failed
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, headers=headers, **kwargs)
+
+    def head(self, url, headers=None, **kwargs):
+        """
+        Send HEAD request through shared session
+
+        Return:
+            requests.Response object
+        Error:
+            requests.exceptions.RequestException - Request failed
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.head(url, headers=headers, **kwargs)
+
+    def set_headers(self, headers):
+        """
+        Update default headers of session
+        """
+        self.session.headers.update(headers)
+
+    def headers(self):
+        """
+        Return copy of default headers
+        """
+        return dict(self.session.headers)
+
+    def set_cookies(self, cookies):
+        """
+        Add cookies to session, e.g. login session exported from selenium browser
+
+        Input:
+            cookies - List of dict with name, value and optional domain, path, secure
+                      (format of selenium get_cookies)
+        """
+        for cookie in cookies:
+            self.session.cookies.set(cookie['name'], cookie['value'],
+                                     domain=cookie.get('domain', ''), path=cookie.get('path', '/'),
+                                     secure=cookie.get('secure', False))
+
+    def async_session(self, limit=100, limit_per_host=2):
+        """
+        aiohttp session sharing headers and timeouts of this client
+
+        Return:
+            aiohttp.ClientSession object
+        """
+        connect_timeout, read_timeout = self.timeout
+        connector = aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host)
+        timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers(),
+                                     cookie_jar=self._cookie_jar())
+
+    def _cookie_jar(self):
+        """
+        aiohttp cookie jar with cookies of session, each cookie kept to its own domain
+        """
+        jar = aiohttp.CookieJar()
+        for cookie in self.session.cookies:
+            morsels = http.cookies.SimpleCookie()
+            morsels[cookie.name] = cookie.value
+            morsels[cookie.name]['path'] = cookie.path
+            if cookie.domain_specified:
+                morsels[cookie.name]['domain'] = cookie.domain
+            jar.update_cookies(morsels, yarl.URL('https://{}/'.format(cookie.domain.lstrip('.'))))
+        return jar
+
+    def close(self):
+        """
+        Close connection pools
+        """
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client():
+    """
+    Return shared HTTPClient object
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
+
+
+def configure(headers=None, pool_size=10, connect_timeout=10, read_timeout=30):
+    """
+    Replace shared HTTPClient object with new settings
+
+    Return:
+        Shared HTTPClient object
+    """
+    global _client
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = HTTPClient(headers, pool_size, connect_timeout, read_timeout)
+        return _client
@@ -0,0 +1,184 @@
+"""
+Program:
+    Persistent chapter download queue for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Queue csv row: id, section, comic, tag, priority, pages, added, status
+    Run order: higher priority first, priority grows with waiting time (aging),
+    smaller chapters first on same priority, comics take turns (fairness)
+"""
+
+import os, csv
+import fcntl
+import time, math
+import contextlib
+
+
+QUEUED = 'queued'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+# Default priority of chapters of comics still in progress
+ONGOING_PRIORITY = 10
+
+FIELDS = ('id', 'section', 'comic', 'tag', 'priority', 'pages', 'added', 'status')
+
+
+class JobQueue():
+
+    def __init__(self, path, aging=3600):
+        """
+        Input:
+            path - Queue csv file path
+            aging - Seconds of waiting to raise priority by 1, 0 for no aging
+        """
+        self.path = path
+        self.aging = aging
+
+    def add(self, section, comic, tag, priority=0, pages=0):
+        """
+        Queue chapter tag of comic
+
+        Return:
+            Job id, None if chapter already queued
+        """
+        with self._locked() as jobs:
+            for job in jobs:
+                if (job['section'], job['comic'], job['tag'], job['status']) == (section, comic, tag, QUEUED):
+                    return None
+
+            job_id = max([job['id'] for job in jobs], default=0) + 1
+            jobs.append({
+                'id': job_id, 'section': section, 'comic': comic, 'tag': tag,
+                'priority': float(priority), 'pages': pages, 'added': time.time(), 'status': QUEUED
+            })
+            return job_id
+
+    def jobs(self, section=None, status=None):
+        """
+        Return list of jobs in id order, filtered by section and status if given
+        """
+        return [job for job in self._load()
+                if (section is None or job['section'] == section)
+                and (status is None or job['status'] == status)]
+
+    def score(self, job, now=None):
+        """
+        Return effective priority of job, raised by waiting time
+        """
+        if self.aging <= 0:
+            return job['priority']
+        now = now or time.time()
+        return job['priority'] + (now - job['added']) / self.aging
+
+    def ordered(self, section=None):
+        """
+        Return queued jobs in run order
+        Whole priority levels run highest first,
+        inside a level best job of each comic is taken in turn so no comic is starved
+        """
+        now = time.time()
+        # Smaller chapters first within the same level
+        levels = {}
+        for job in sorted(self.jobs(section, QUEUED), key=lambda job: (job['pages'], job['tag'])):
+            levels.setdefault(math.floor(self.score(job, now)), []).append(job)
+
+        ordered = []
+        for level in sorted(levels, reverse=True):
+            lanes = {}
+            for job in levels[level]:
+                lanes.setdefault((job['section'], job['comic']), []).append(job)
+            lanes = list(lanes.values())
+
+            while lanes:
+                for lane in lanes:
+                    ordered.append(lane.pop(0))
+                lanes = [lane for lane in lanes if lane]
+
+        return ordered
+
+    def bump(self, job_id, amount=1):
+        """
+        Raise priority of queued job by amount
+
+        Return:
+            True if job found
+        """
+        with self._locked() as jobs:
+            for job in jobs:
+                if job['id'] == job_id and job['status'] == QUEUED:
+                    job['priority'] += amount
+                    return True
+        return False
+
+    def cancel(self, job_id):
+        """
+        Cancel queued job
+
+        Return:
+            True if job found
+        """
+        return self.finish(job_id, CANCELLED)
+
+    def finish(self, job_id, status):
+        """
+        Set status of queued job
+
+        Return:
+            True if job found
+        """
+        with self._locked() as jobs:
+            for job in jobs:
+                if job['id'] == job_id and job['status'] == QUEUED:
+                    job['status'] = status
+                    return True
+        return False
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """
+        Load jobs under file lock and save them on exit
+        Queue may be changed by other pycomic process at the same time
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', mode='w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                jobs = self._load()
+                yield jobs
+                self._save(jobs)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        """
+        Read queue csv file
+        """
+        if not os.path.isfile(self.path):
+            return []
+
+        jobs = []
+        with open(self.path, mode='rt', encoding='utf-8') as file:
+            for row in csv.reader(file):
+                job = dict(zip(FIELDS, row))
+                job['id'], job['tag'], job['pages'] = int(job['id']), int(job['tag']), int(job['pages'])
+                job['priority'], job['added'] = float(job['priority']), float(job['added'])
+                jobs.append(job)
+
+        return jobs
+
+    def _save(self, jobs):
+        """
+        Write queue csv file through temporary file
+        """
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, mode='wt', encoding='utf-8') as file:
+            csv_writer = csv.writer(file)
+            for job in jobs:
+                csv_writer.writerow([job[field] for field in FIELDS])
+
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,195 @@
+"""
+Program:
+    Browserless manhuagui chapter decoder for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Chapter page carries image data in a packed script (p,a,c,k,e,d),
+    word list of the script is LZString compressed in base64
+    Decoded script: SMH.imgData({... "files": [...], "path": ..., "sl": {"e": ..., "m": ...}}).preInit();
+"""
+
+import re, json
+
+from urllib.parse import quote
+
+from pycomic_pkg import exceptions as pycomic_err
+
+
+IMAGE_HOST = 'i.hamreus.com'
+
+_BASE64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/='
+_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# }('payload',radix,count,'word list'[
+_PACKED = re.compile(r"\}\('((?:[^'\\]|\\.)*)',(\d+),(\d+),'([\w+/=]*)'\[")
+_IMAGE_DATA = re.compile(r'imgData\((\{.*\})\)')
+
+
+def chapter_urls(html, host=IMAGE_HOST):
+    """
+    Decode image urls of manhuagui chapter page
+
+    Parameters:
+        html - Chapter page source
+        host - Image host name
+    Return:
+        List of image urls in page order
+    Error:
+        pycomic_err.DecodeError - Page has no decodable image data
+    """
+    data = image_data(html)
+    try:
+        path, files = data['path'], data['files']
+        signature = data.get('sl', {})
+    except (KeyError, TypeError) as err:
+        raise pycomic_err.DecodeError('Image data field missing: {}'.format(err))
+    if not files:
+        raise pycomic_err.DecodeError('Image data has no file')
+
+    query = '&'.join('{}={}'.format(key, value) for key, value in signature.items())
+    return ['https://{}{}{}'.format(host, quote(path + filename), '?' + query if query else '')
+            for filename in files]
+
+
+def has_packed_script(html):
+    """
+    Page carries packed image data script
+    """
+    return _PACKED.search(html) is not None
+
+
+def image_data(html):
+    """
+    Return image data dict of chapter page
+
+    Error:
+        pycomic_err.DecodeError - Page has no decodable image data
+    """
+    match = _PACKED.search(html)
+    if match is None:
+        raise pycomic_err.DecodeError('Packed script not found')
+
+    payload = re.sub(r"\\(.)", r'\1', match.group(1))
+    words = decompress_from_base64(match.group(4)).split('|')
+    script = unpack(payload, int(match.group(2)), int(match.group(3)), words)
+
+    data_match = _IMAGE_DATA.search(script)
+    if data_match is None:
+        raise pycomic_err.DecodeError('Image data not found in script')
+    try:
+        return json.loads(data_match.group(1))
+    except ValueError as err:
+        raise pycomic_err.DecodeError('Image data not valid: {}'.format(err))
+
+
+def unpack(payload, radix, count, words):
+    """
+    Replace encoded words of packed script payload
+    Counterpart of javascript packer function(p,a,c,k,e,d)
+    """
+    table = {}
+    for index in range(count):
+        token = _encode(index, radix)
+        table[token] = words[index] if index < len(words) and words[index] else token
+
+    # Word boundary of javascript, \w is ascii only
+    return re.sub(r'\b\w+\b', lambda match: table.get(match.group(0), match.group(0)), payload,
+                  flags=re.ASCII)
+
+
+def _encode(number, radix):
+    """
+    Word token of number, same as e(c) of packer
+    """
+    prefix = '' if number < radix else _encode(number // radix, radix)
+    number = number % radix
+    return prefix + (chr(number + 29) if number > 35 else _DIGITS[number])
+
+
+def decompress_from_base64(data):
+    """
+    LZString.decompressFromBase64
+
+    Error:
+        pycomic_err.DecodeError - Data is not valid LZString
+    """
+    if not data:
+        return ''
+
+    values = {char: index for index, char in enumerate(_BASE64)}
+    try:
+        codes = [values[char] for char in data]
+    except KeyError as err:
+        raise pycomic_err.DecodeError('Character {} not base64'.format(err))
+
+    return _decompress(codes, 32)
+
+
+def _decompress(codes, reset_value):
+    """
+    LZString._decompress over list of codes
+    """
+    state = {'value': codes[0], 'position': reset_value, 'index': 1}
+
+    def read_bits(count):
+        bits, power = 0, 1
+        for _ in range(count):
+            bit = state['value'] & state['position']
+            state['position'] >>= 1
+            if state['position'] == 0:
+                state['position'] = reset_value
+                state['value'] = codes[state['index']] if state['index'] < len(codes) else 0
+                state['index'] += 1
+            if bit:
+                bits |= power
+            power <<= 1
+        return bits
+
+    # Entries 0, 1, 2 are reserved codes
+    dictionary = [None, None, None]
+    enlarge_in, num_bits = 4, 3
+
+    kind = read_bits(2)
+    if kind == 0:
+        word = chr(read_bits(8))
+    elif kind == 1:
+        word = chr(read_bits(16))
+    else:
+        return ''
+    dictionary.append(word)
+    result = [word]
+
+    while True:
+        if state['index'] > len(codes):
+            return ''
+
+        code = read_bits(num_bits)
+        if code in (0, 1):
+            dictionary.append(chr(read_bits(8 if code == 0 else 16)))
+            code = len(dictionary) - 1
+            enlarge_in -= 1
+        elif code == 2:
+            return ''.join(result)
+
+        if enlarge_in == 0:
+            enlarge_in = 2 ** num_bits
+            num_bits += 1
+
+        if code < len(dictionary):
+            entry = dictionary[code]
+        elif code == len(dictionary):
+            entry = word + word[0]
+        else:
+            raise pycomic_err.DecodeError('LZString code {} not valid'.format(code))
+        result.append(entry)
+
+        dictionary.append(word + entry[0])
+        enlarge_in -= 1
+        word = entry
+
+        if enlarge_in == 0:
+            enlarge_in = 2 ** num_bits
+            num_bits += 1
@@ -0,0 +1,144 @@
+"""
+Program:
+    Chapter download manifest for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Manifest csv row: index, url, filename, status, size, sha256
+"""
+
+import os, csv
+import threading
+
+
+PENDING = 'pending'
+COMPLETE = 'complete'
+FAILED = 'failed'
+PLACEHOLDER = 'placeholder'
+
+
+class Manifest():
+
+    def __init__(self, path=None):
+        """
+        Input:
+            path - Manifest csv file path, loaded if exist
+                   None keeps manifest in memory only
+        """
+        self.path = path
+        self.pages = dict()
+        self._lock = threading.Lock()
+
+        if self.path and os.path.isfile(self.path):
+            self._load()
+
+    def __len__(self):
+        return len(self.pages)
+
+    def filename(self, index):
+        """
+        Return recorded filename of page index, None if not recorded
+        """
+        page = self.pages.get(index)
+        return page['filename'] if page else None
+
+    def status(self, index):
+        """
+        Return recorded status of page index, None if not recorded
+        """
+        page = self.pages.get(index)
+        return page['status'] if page else None
+
+    def is_complete(self, index, directory):
+        """
+        Page index is complete and its file in directory matches recorded size
+        """
+        page = self.pages.get(index)
+        if page is None or page['status'] != COMPLETE:
+            return False
+
+        file_path = os.path.join(directory, page['filename'])
+        return os.path.isfile(file_path) and os.path.getsize(file_path) == page['size']
+
+    def all_complete(self, directory, total):
+        """
+        All total pages are complete in directory
+        """
+        return all(self.is_complete(index, directory) for index in range(total))
+
+    def update(self, index, url, filename, status, size=0, digest=''):
+        """
+        Record page information and save manifest file
+        """
+        with self._lock:
+            self.pages[index] = {
+                'url': url, 'filename': filename, 'status': status, 'size': size, 'sha256': digest
+            }
+            self._save()
+
+    def register(self, pages):
+        """
+        Record pages not in manifest as pending and save manifest file
+
+        Parameter:
+            pages - iterable of (index, url, filename)
+        """
+        with self._lock:
+            for index, url, filename in pages:
+                if index not in self.pages:
+                    self.pages[index] = {
+                        'url': url, 'filename': filename, 'status': PENDING, 'size': 0, 'sha256': ''
+                    }
+            self._save()
+
+    def rename(self, index, filename):
+        """
+        Change recorded filename of page index and save manifest file
+        """
+        with self._lock:
+            self.pages[index]['filename'] = filename
+            self._save()
+
+    def failed(self):
+        """
+        Return sorted list of indexes which are not complete
+        """
+        return sorted(index for index, page in self.pages.items() if page['status'] != COMPLETE)
+
+    def placeholders(self):
+        """
+        Return sorted list of indexes which got placeholder image
+        """
+        return sorted(index for index, page in self.pages.items() if page['status'] == PLACEHOLDER)
+
+    def _load(self):
+        """
+        Read manifest csv file
+        """
+        with open(self.path, mode='rt', encoding='utf-8') as file:
+            for row in csv.reader(file):
+                index, url, filename, status, size, digest = row
+                self.pages[int(index)] = {
+                    'url': url, 'filename': filename, 'status': status, 'size': int(size), 'sha256': digest
+                }
+
+    def _save(self):
+        """
+        Write manifest csv file through temporary file
+        """
+        if not self.path:
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+
+        with open(tmp_path, mode='wt', encoding='utf-8') as file:
+            csv_writer = csv.writer(file)
+            for index in sorted(self.pages):
+                page = self.pages[index]
+                csv_writer.writerow((index, page['url'], page['filename'], page['status'],
+                                     page['size'], page['sha256']))
+
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,141 @@
+"""
+Program:
+    Image host mirror selection for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Mirrors serve the same image path on different hosts,
+    urls are rewritten to the healthy mirror with lowest latency and error rate
+"""
+
+import time
+import threading
+
+from urllib.parse import urlparse
+
+import requests
+
+
+# Weight of newest sample in moving averages
+ALPHA = 0.3
+# Consecutive failures to put host on cooldown
+FAILURE_LIMIT = 3
+# Seconds of first cooldown, doubled on each cooldown in a row
+COOLDOWN = 30
+
+
+class MirrorSet():
+
+    def __init__(self, hosts=()):
+        """
+        Input:
+            hosts - Mirror host names, e.g. i.hamreus.com
+        """
+        self._lock = threading.Lock()
+        self._hosts = {}
+        for host in hosts:
+            self.learn(host)
+
+    def __len__(self):
+        return len(self._hosts)
+
+    def learn(self, host):
+        """
+        Add host to mirror set
+        """
+        with self._lock:
+            if host and host not in self._hosts:
+                self._hosts[host] = {
+                    'latency': None, 'errors': 0.0, 'failures': 0, 'cooldowns': 0, 'until': 0
+                }
+
+    def record(self, url, latency=None):
+        """
+        Record request result of url's host
+
+        Parameter:
+            latency - Seconds of successful request, None if request failed
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                return
+
+            if latency is None:
+                stats['errors'] = (1 - ALPHA) * stats['errors'] + ALPHA
+                stats['failures'] += 1
+                if stats['failures'] >= FAILURE_LIMIT:
+                    cooldown = COOLDOWN * (2 ** stats['cooldowns'])
+                    stats['until'] = time.monotonic() + cooldown
+                    stats['cooldowns'] += 1
+                    stats['failures'] = 0
+                    print('Mirror {} failing, cooldown {} seconds'.format(host, cooldown))
+            else:
+                stats['errors'] = (1 - ALPHA) * stats['errors']
+                stats['failures'], stats['cooldowns'] = 0, 0
+                if stats['latency'] is None:
+                    stats['latency'] = latency
+                else:
+                    stats['latency'] = (1 - ALPHA) * stats['latency'] + ALPHA * latency
+
+    def best(self):
+        """
+        Return healthy host with lowest latency weighted by error rate
+        None if no host is healthy
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [(host, stats) for host, stats in self._hosts.items() if stats['until'] <= now]
+            if not healthy:
+                return None
+
+            # Hosts never measured go last
+            def score(item):
+                stats = item[1]
+                if stats['latency'] is None:
+                    return float('inf')
+                return stats['latency'] * (1 + 4 * stats['errors'])
+
+            return min(healthy, key=score)[0]
+
+    def rewrite(self, url):
+        """
+        Replace host of url with best mirror
+        url is returned unchanged if its host is not a mirror or no mirror is healthy
+        """
+        parsed = urlparse(url)
+        if parsed.netloc not in self._hosts:
+            return url
+
+        host = self.best()
+        if host is None or host == parsed.netloc:
+            return url
+        return parsed._replace(netloc=host).geturl()
+
+    def probe(self, client, url, header=None):
+        """
+        Measure every mirror with HEAD request of url's path
+
+        Parameter:
+            client - HTTPClient object sending request
+        """
+        parsed = urlparse(url)
+        for host in list(self._hosts):
+            mirror_url = parsed._replace(netloc=host).geturl()
+            started = time.monotonic()
+            try:
+                response = client.head(mirror_url, headers=header)
+                ok = response.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            self.record(mirror_url, time.monotonic() - started if ok else None)
+
+    def stats(self):
+        """
+        Return copy of per host statistics
+        """
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._hosts.items()}
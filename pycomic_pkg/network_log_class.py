@@ -0,0 +1,134 @@
+"""
+Program:
+    Browser network log reader for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Browser must be started with performance logging (BrowserPool network_log=True),
+    requests are followed through redirects so the final CDN url is returned
+    Response body is read with DevTools command Network.getResponseBody (selenium 3.141+)
+"""
+
+import json
+import time
+import base64
+
+from urllib.parse import unquote
+
+from selenium.common.exceptions import WebDriverException
+
+
+class NetworkLog():
+
+    def __init__(self, driver):
+        """
+        Input:
+            driver - selenium WebDriver with performance log enabled
+        """
+        self.driver = driver
+        # requestId: first requested url
+        self._requests = {}
+        # first requested url: (final url, status)
+        self._responses = {}
+        # first requested url: requestId of response
+        self._response_ids = {}
+        # requestId of requests finished loading body
+        self._finished = set()
+
+    def poll(self):
+        """
+        Read new performance log entries of browser
+        """
+        for entry in self.driver.get_log('performance'):
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+
+            params = message.get('params', {})
+            if message.get('method') == 'Network.requestWillBeSent':
+                # Redirects keep requestId, first url is kept
+                self._requests.setdefault(params['requestId'], _key(params['request']['url']))
+            elif message.get('method') == 'Network.responseReceived':
+                response = params['response']
+                first_url = self._requests.get(params['requestId'], _key(response['url']))
+                self._responses[first_url] = (response['url'], response['status'])
+                self._response_ids[first_url] = params['requestId']
+            elif message.get('method') in ('Network.loadingFinished', 'Network.loadingFailed'):
+                self._finished.add(params['requestId'])
+
+    def response(self, url):
+        """
+        Return tuple (final url, status) of request to url, None if not received yet
+        """
+        self.poll()
+        return self._responses.get(_key(url))
+
+    def wait_response(self, url, timeout=10, interval=0.1):
+        """
+        Wait until response of request to url is received
+
+        Return:
+            Tuple (final url, status), None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            result = self.response(url)
+            if result is not None or time.monotonic() >= deadline:
+                return result
+            time.sleep(interval)
+
+    def body(self, url):
+        """
+        Return response body bytes of request to url, None if body not loaded yet
+
+        Error:
+            WebDriverException - Browser does not hold body, e.g. loading failed
+        """
+        self.poll()
+        request_id = self._response_ids.get(_key(url))
+        if request_id not in self._finished:
+            return None
+
+        result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        if result.get('base64Encoded'):
+            return base64.b64decode(result['body'])
+        return result['body'].encode('utf-8')
+
+    def wait_body(self, url, timeout=10, interval=0.1):
+        """
+        Wait until response body of request to url is loaded
+
+        Return:
+            Body bytes, None on timeout or if browser does not hold body
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                result = self.body(url)
+            except (AttributeError, WebDriverException):
+                # Driver without DevTools command, or body already dropped
+                return None
+            if result is not None or time.monotonic() >= deadline:
+                return result
+            time.sleep(interval)
+
+    def clear(self):
+        """
+        Drop entries read so far and entries still buffered in browser
+        """
+        self.driver.get_log('performance')
+        self._requests.clear()
+        self._responses.clear()
+        self._response_ids.clear()
+        self._finished.clear()
+
+
+
+def _key(url):
+    """
+    Compare urls without percent-encoding difference
+    """
+    return unquote(url)
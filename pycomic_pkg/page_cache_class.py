@@ -0,0 +1,102 @@
+"""
+Program:
+    On-disk conditional-GET page cache for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Each url is kept as KEY.json (ETag, Last-Modified, fetch time)
+    and KEY.gz (gzip compressed body), KEY is sha256 of url
+"""
+
+import os, json
+import gzip, hashlib
+import time
+
+
+class PageCache():
+
+    def __init__(self, directory, ttl=3600):
+        """
+        Input:
+            directory - Cache directory
+            ttl - Seconds cached page is used without revalidation, 0 to always revalidate
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def get(self, client, url):
+        """
+        Body of url, revalidated with If-None-Match / If-Modified-Since when ttl expired
+
+        Parameter:
+            client - HTTPClient object sending request
+        Return:
+            Response body in bytes
+        Error:
+            requests.exceptions.HTTPError - Request failed
+            requests.exceptions.RequestException - Connection failed or timed out
+        """
+        meta, body = self._load(url)
+        if body is not None and time.time() - meta['fetched'] < self.ttl:
+            return body
+
+        headers = {}
+        if body is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = client.get(url, headers=headers)
+        if response.status_code == 304 and body is not None:
+            meta['fetched'] = time.time()
+            self._save_meta(url, meta)
+            return body
+
+        response.raise_for_status()
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched': time.time()
+        }
+        self._save(url, meta, response.content)
+
+        return response.content
+
+    def _path(self, url, extension):
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.directory, key + extension)
+
+    def _load(self, url):
+        """
+        Return:
+            Tuple: (meta dict, body bytes), (None, None) if url not cached
+        """
+        try:
+            with open(self._path(url, '.json'), mode='rt', encoding='utf-8') as file:
+                meta = json.load(file)
+            with gzip.open(self._path(url, '.gz'), mode='rb') as file:
+                body = file.read()
+        except (OSError, ValueError):
+            return None, None
+
+        return meta, body
+
+    def _save(self, url, meta, body):
+        os.makedirs(self.directory, exist_ok=True)
+
+        tmp_path = self._path(url, '.gz.tmp')
+        with gzip.open(tmp_path, mode='wb') as file:
+            file.write(body)
+        os.replace(tmp_path, self._path(url, '.gz'))
+
+        self._save_meta(url, meta)
+
+    def _save_meta(self, url, meta):
+        tmp_path = self._path(url, '.json.tmp')
+        with open(tmp_path, mode='wt', encoding='utf-8') as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, self._path(url, '.json'))
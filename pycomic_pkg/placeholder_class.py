@@ -0,0 +1,93 @@
+"""
+Program:
+    Known placeholder image registry for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Registry file line: sha256 hex digest, followed by source url if learned from url
+    Lines start with # are comments
+"""
+
+import os
+import hashlib
+import threading
+
+
+class PlaceholderRegistry():
+
+    def __init__(self, path=None, urls=()):
+        """
+        Input:
+            path - Registry file path, loaded if exist
+                   None keeps registry in memory only
+            urls - Placeholder image urls, such as error-url of configuration
+        """
+        self.path = path
+        self.urls = set(url for url in urls if url)
+        self.digests = dict()
+        self._lock = threading.Lock()
+
+        if self.path and os.path.isfile(self.path):
+            self._load()
+
+    def is_placeholder_url(self, url):
+        """
+        url is a known placeholder image url
+        """
+        return url in self.urls
+
+    def is_placeholder_digest(self, digest):
+        """
+        Image of sha256 hex digest is a known placeholder
+        """
+        return digest in self.digests
+
+    def add(self, digest, url=''):
+        """
+        Record placeholder digest and save registry file
+        """
+        with self._lock:
+            self.digests[digest] = url
+            self._save()
+
+    def learn(self, client):
+        """
+        Download placeholder urls not yet in registry and record their digests
+
+        Parameter:
+            client - HTTPClient object sending request
+        Error:
+            requests.exceptions.RequestException - Request failed
+        """
+        learned = set(self.digests.values())
+        for url in sorted(self.urls - learned):
+            response = client.get(url)
+            response.raise_for_status()
+            self.add(hashlib.sha256(response.content).hexdigest(), url)
+
+    def _load(self):
+        """
+        Read registry file
+        """
+        with open(self.path, mode='rt', encoding='utf-8') as file:
+            for line in file:
+                fields = line.split()
+                if not fields or fields[0].startswith('#'):
+                    continue
+                self.digests[fields[0].lower()] = fields[1] if len(fields) > 1 else ''
+
+    def _save(self):
+        """
+        Write registry file through temporary file
+        """
+        if not self.path:
+            return
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, mode='wt', encoding='utf-8') as file:
+            for digest, url in sorted(self.digests.items()):
+                file.write(' '.join(filter(None, (digest, url))) + '\n')
+
+        os.replace(tmp_path, self.path)
@@ -26,9 +26,9 @@ import requests
 from selenium import webdriver
 
 from pycomic_pkg import exceptions as pycomic_err
-from pycomic_pkg import url_collections as url
 from pycomic_pkg import logging_class as logcl
 from pycomic_pkg import pycomic_lib as pylib
+from pycomic_pkg import comic999_decoder as decoder
 
 
 SECTION = '999COMIC'
@@ -43,10 +43,11 @@ def help():
     USAGE:
         pycomic.py add ENGLISHNAME CHINESENAME NUMBER
         pycomic.py convert-image COMICNAME FILETAG
-        pycomic.py download COMICNAME FILETAG
+        pycomic.py dedup [COMICNAME]
+        pycomic.py download COMICNAME FILETAG|START-END|all-missing
         pycomic.py error-url COMICNAME IDENTITYNUM
         pycomic.py fetch-menu COMICNAME
-        pycomic.py fetch-url COMICNAME IDENTITYNUM
+        pycomic.py fetch-url COMICNAME IDENTITYNUM|START-END [--workers N]
         pycomic.py help
         pycomic.py list [PATTERN]
         pycomic.py list-books origin|format COMICNAME [PATTERN]
@@ -54,6 +55,8 @@ def help():
         pycomic.py list-pdf COMICNAME [PATTERN]
         pycomic.py list-url COMICNAME [PATTERN]
         pycomic.py make-pdf COMICNAME FILETAG
+        pycomic.py queue add|list|bump|cancel|run
+        pycomic.py rename-pages [COMICNAME]
         pycomic.py source [file|999comics|manhuagui]
         pycomic.py state-change COMICNAME
         pycomic.py verify-image COMICNAME FILETAG
@@ -150,7 +153,8 @@ def convert_image(pyconfig):
         sys.exit(21)
 
     try:
-        pylib.convert_images_jpg(comic.path['origin'], comic.path['format'])
+        pylib.convert_images_jpg(comic.path['origin'], comic.path['format'],
+                                 store=pylib.blob_store(pyconfig, SECTION))
     except IOError:
         logger.warning('Failed to convert {} to jpeg files'.format(comic.path['origin']))
         shutil.rmtree(comic.path['format'])
@@ -161,17 +165,22 @@ def convert_image(pyconfig):
 
 
 
+def dedup(pyconfig):
+    pylib.dedup_command(pyconfig, SECTION)
+
+
 def download(pyconfig):
     message = \
     """
     USAGE:
-        pycomic.py download COMICNAME FILETAG
+        pycomic.py download COMICNAME FILETAG|START-END|all-missing
     NOTE:
         Use 'pycomic.py list-url' command to get FILETAG value
+        Multiple FILETAG can be separated by comma, e.g. 1,5,10-80
     """
     try:
         comic_name = sys.argv[2]
-        request_tag = int(sys.argv[3])
+        selection = sys.argv[3]
     except IndexError:
         print(message)
         sys.exit(1)
@@ -180,52 +189,42 @@ def download(pyconfig):
     pylib.check_structure(pyconfig, SECTION)
 
     # Find comic from menu csv file
-    try:
-        eng_name, ch_name, number, _status = pylib.find_menu_comic(pyconfig, SECTION, comic_name)
-    except pycomic_err.ComicNotFoundError:
-        logger.info('No match to {} found'.format(comic_name))
-        sys.exit(11)
+    eng_name, ch_name, number, _status = _check_comic_existence(pyconfig, comic_name)
 
     # Define comic object
     comic = pylib.Comic(eng_name, ch_name, number)
     comic.file_path(pyconfig.links(SECTION), 'links-dir')
-    # Get request tag's filename
+    # Get request tags
     try:
-        request_file = pylib.index_data(comic.path['links-dir'], request_tag, file=False)
-    except pycomic_err.CSVError as err:
-        logger.warning(err)
-        logger.info('Failed to list directory {}'.format(comic.path['links-dir']))
-        sys.exit(16)
-    except pycomic_err.DataIndexError:
-        logger.info('File Tag {} not found'.format(request_tag))
+        request_tags = pylib.select_tags(selection, dict(pylib.list_files(comic.path['links-dir'], '')))
+    except ValueError:
+        print(message)
+        sys.exit(1)
+    if not request_tags:
+        logger.info('File Tag {} not found'.format(selection))
         sys.exit(18)
 
-    comic.file_path(pyconfig.origin(SECTION), 'book', name=request_file.split('.')[0])
-    comic.file_path(pyconfig.links(SECTION), 'links', name=request_file)
+    # Queue every chapter which is not complete, resume from manifest if downloaded before
+    tags, chapters, skipped = pylib.prepare_chapters(pyconfig, SECTION, comic, request_tags,
+                                                     missing_only=selection == 'all-missing')
+    if not chapters:
+        if skipped:
+            sys.exit(10)
+        return
 
-    # Download images
+    pylib.configure_client(pyconfig, SECTION)
     try:
-        os.makedirs(comic.path['book'])
-    except OSError:
-        logger.warning('Directory {} already exist'.format(comic.path['book']))
-        sys.exit(10)
-
-    urls = url.extract_images(comic.path['links'], duplicates=True)
-    # Remove book directory if error occur when downloading images
-    header = {'User-Agent': pyconfig.useragent(SECTION)}
-    try:
-        errors = url.download_images(urls, comic.path['book'], header=header)
+        errors = pylib.download_chapters(pyconfig, SECTION, chapters, log_dir=LOG_DIR)
     except Exception as err:
         logger.warning(err)
-        shutil.rmtree(comic.path['book'])
         sys.exit(41)
-        
-    # Show download error messages
-    for error_message in errors:
-        logger.info(error_message)
 
-    # Download success
-    logger.info('Download {} {} complete'.format(comic.english, request_tag))
+    pylib.report_chapters([(comic, tag) for tag in tags], errors)
+
+    if any(errors):
+        sys.exit(33)
+    if skipped:
+        sys.exit(10)
 
 
 
@@ -292,9 +291,10 @@ def fetch_menu(pyconfig):
     comic.comic_site(pyconfig.site_url(SECTION), 'site-url')
 
     # Page request
+    pylib.configure_client(pyconfig, SECTION)
     try:
-        page_parse = pylib.request_page(comic.path['site-url'])
-    except requests.exceptions.HTTPError:
+        page_parse = pylib.request_page(comic.path['site-url'], cache=pylib.page_cache(pyconfig, SECTION))
+    except requests.exceptions.RequestException:
         logger.warning('Request to {} fail'.format(comic.path['site-url']))
         sys.exit(31)
 
@@ -332,17 +332,33 @@ def fetch_url(pyconfig):
     message = \
     """
     USAGE:
-        pycomic.py fetch-url COMICNAME IDENTITYNUM
+        pycomic.py fetch-url COMICNAME IDENTITYNUM|START-END [--workers N]
     NOTE:
         Use 'pycomic.py list-menu' command to get IDENTITYNUM
+        Multiple IDENTITYNUM can be separated by comma, e.g. 1,5,10-50
+        --workers N harvests N chapters at once in separate headless browsers
     """
     try:
-        comic_name = sys.argv[2]
-        request_identity = int(sys.argv[3])
-    except:
+        args = sys.argv[2:]
+        workers = pylib.pop_option(args, '--workers')
+        workers = int(workers) if workers is not None else None
+        comic_name, selection = args[0], args[1]
+    except (IndexError, ValueError):
         print(message)
         sys.exit(1)
 
+    # Chekc config file integrity
+    try:
+        pyconfig.config_test(SECTION, output=True)
+    except pycomic_err.NoSectionError:
+        sys.exit(102)
+    except pycomic_err.NoOptionError:
+        sys.exit(103)
+
+    # Default workers from config, read after section is checked
+    if workers is None:
+        workers = pyconfig.browsers(SECTION)
+
     # Check directory structure
     pylib.check_structure(pyconfig, SECTION)
 
@@ -354,51 +370,50 @@ def fetch_url(pyconfig):
     comic.file_path(pyconfig.menu(SECTION), 'menu', extension='_menu.csv')
     # Read comic URL from COMICNAME_menu.csv file
     try:
-        comic_data = pylib.index_data(comic.path['menu'], request_identity)
+        menu = pylib.read_csv(comic.path['menu'])
     except pycomic_err.CSVError as err:
         logger.warning(err)
         logger.info('Failed to read file {}'.format(comic.path['menu']))
         sys.exit(16)
-    except pycomic_err.DataIndexError:
-        logger.info('Identity Number {} not found'.format(request_identity))
-        sys.exit(18)
-
-    driver = pylib.Driver(comic_data[0], comic_data[1])
-
-    # comic.chapter_title, comic.url = comic_data[0], comic_data[1]
-    comic.file_path(pyconfig.links(SECTION), 'links', name=comic.english, extension='_{}.csv'.format(driver.chapter_title))
-    comic.file_path(pyconfig.links(SECTION), 'links-dir')
-
-    # Start selenium driver
-    try:
-        driver.get()
-    except:
-        logger.info('Driver failed to request {}'.format(driver.chapter_url))
-        sys.exit(3)
-
-    # Information parsing
-    try:
-        driver.find_last_page('#pageSelect option:nth-last-child(1)')
-    except pylib.Driver.DriverError as err:
-        logger.warning('Error: {}'.format(err))
-        logger.info('Failed to get last page value')
-        sys.exit(32)
 
-    # Fetch urls
-    driver.get_urls('manga', 'next', error_text=pyconfig.error_url(SECTION))
-
-    # Write to csv file
-    os.makedirs(comic.path['links-dir'], exist_ok=True)
     try:
-        pylib.write_csv(comic.path['links'], driver.urls, index=True)
-    except pycomic_err.CSVError as err:
-        logger.warning('Error" {}'.format(err))
-        logger.info('Failed to write to {}'.format(comic.path['links']))
+        request_identities = pylib.select_tags(selection, range(len(menu)))
+    except ValueError:
+        print(message)
+        sys.exit(1)
+    if not request_identities:
+        logger.info('Identity Number {} not found'.format(selection))
+        sys.exit(18)
 
-        os.remove(comic.path['links'])
-        sys.exit(16)
-    else:
-        logger.info('Write file {} success'.format(comic.path['links']))
+    # Links csv file of each chapter
+    chapters = []
+    for identity in request_identities:
+        chapter_title, chapter_url = menu[identity][0], menu[identity][1]
+        comic.file_path(pyconfig.links(SECTION), 'links', name=comic.english, extension='_{}.csv'.format(chapter_title))
+        chapters.append((chapter_title, chapter_url, comic.path['links']))
+
+    # Decode urls from chapter page without browser if harvest option is decode
+    codes = [None] * len(chapters)
+    if pyconfig.harvest(SECTION) == 'decode':
+        image_host = pyconfig.image_host(SECTION)
+        host = 'https://' + image_host if image_host else pyconfig.home_url(SECTION)
+        codes = pylib.decode_chapters(pyconfig, SECTION, chapters, lambda html: decoder.chapter_urls(html, host),
+                                      workers=workers)
+
+    # Fetch urls of chapters not decoded, chapters are spread across browsers
+    remain = [index for index, code in enumerate(codes) if code is None]
+    if remain:
+        remain_codes = pylib.fetch_chapter_urls(pyconfig, SECTION, [chapters[index] for index in remain],
+                                                'manga', '#pageSelect option:nth-last-child(1)', 'next',
+                                                workers=workers)
+        for index, code in zip(remain, remain_codes):
+            codes[index] = code
+
+    failed = [(identity, code) for identity, code in zip(request_identities, codes) if code]
+    for identity, code in failed:
+        logger.info('Identity Number {} failed'.format(identity))
+    if failed:
+        sys.exit(failed[0][1])
 
 
 def list(pyconfig):
@@ -622,6 +637,14 @@ def make_pdf(pyconfig):
         logger.info('Make PDF {} success'.format(comic.path['pdf']))
 
 
+def queue(pyconfig):
+    pylib.queue_command(pyconfig, SECTION, log_dir=LOG_DIR)
+
+
+def rename_pages(pyconfig):
+    pylib.rename_pages_command(pyconfig, SECTION)
+
+
 def source(pyconfig):
     message = \
     """
@@ -7,6 +7,7 @@ Author:
 Error Code:
     1 - Program usage error
     3 - Webpage request error
+    10 - OSError catch
     11 - ComicNotFoundError catch
     12 - UpdateError catch
     13 - FileNotFoundError catch
@@ -21,6 +22,8 @@ Error Code:
 import sys, os
 import csv, shutil
 
+from selenium.common.exceptions import WebDriverException
+
 from pycomic_pkg import exceptions as pycomic_err
 from pycomic_pkg import url_collections as url
 from pycomic_pkg import logging_class as logcl
@@ -41,6 +44,7 @@ def help():
     USAGE:
         pycomic.py add ENGLISHNAME CHINESENAME
         pycomic.py convert COMICNAME
+        pycomic.py dedup [COMICNAME]
         pycomic.py download COMICNAME
         pycomic.py fetch-url COMICNAME
         pycomic.py help
@@ -49,6 +53,7 @@ def help():
         pycomic.py list-pdf [PATTERN]
         pycomic.py list-url [PATTERN]
         pycomic.py make-pdf COMICNAME
+        pycomic.py rename-pages [COMICNAME]
         pycomic.py source [file|999comics|manhuagui]
         pycomic.py state-change COMICNAME
         pycomic.py verify COMICNAME
@@ -176,7 +181,8 @@ def convert(pyconfig):
         sys.exit(21)
 
     try:
-        pylib.convert_images_jpg(comic.path['origin'], comic.path['format'])
+        pylib.convert_images_jpg(comic.path['origin'], comic.path['format'],
+                                 store=pylib.blob_store(pyconfig, SECTION))
     except IOError:
         logger.warning('Failed to convert {} to jpeg files'.format(comic.path['origin']))
         shutil.rmtree(comic.path['format'])
@@ -185,6 +191,10 @@ def convert(pyconfig):
         logger.info('Convert {} to jpeg files success'.format(comic.path['origin']))
 
 
+def dedup(pyconfig):
+    pylib.dedup_command(pyconfig, SECTION)
+
+
 def download(pyconfig):
     message = \
     """
@@ -220,17 +230,23 @@ def download(pyconfig):
     comic = pylib.Comic(eng_name, ch_name)
     comic.file_path(pyconfig.origin(SECTION), 'book')
     comic.file_path(pyconfig.refine(SECTION), 'refine')
+    comic.file_path(pyconfig.manifest(SECTION), 'manifest', extension='.csv')
 
-    # Download images
-    header = {'User-Agent': pyconfig.useragent(SECTION)}
+    # Download images, resume from manifest if comic was downloaded before
     try:
-        os.mkdir(comic.path['book'])
-    except FileExistsError:
+        manifest = pylib.load_manifest(comic.path['manifest'], comic.path['book'])
+    except pycomic_err.FileExistError:
         logger.warning('Directory {} already exist'.format(comic.path['book']))
         sys.exit(21)
+
     urls = url.extract_images(comic.path['refine'])
-    print('Header: {}'.format(header))
-    errors = url.download_images(urls, comic.path['book'], header=header)
+    if manifest.all_complete(comic.path['book'], len(urls)):
+        logger.info('Download {} already complete'.format(comic.english))
+        return
+
+    pylib.configure_client(pyconfig, SECTION)
+    errors = pylib.download_images(pyconfig, SECTION, urls, comic.path['book'], manifest=manifest,
+                                   log_dir=LOG_DIR)
     # errors = url.download_images(urls, comic.path['book'], header='Mozilla/5.0 (X11; Linux x86_64; rv:60.0) Gecko/20100101 Firefox/60.0')
 
     # Show download error messages
@@ -467,6 +483,10 @@ def make_pdf(pyconfig):
         logger.info('Make PDF {} success'.format(comic.path['pdf']))
 
 
+def rename_pages(pyconfig):
+    pylib.rename_pages_command(pyconfig, SECTION)
+
+
 def source(pyconfig):
     message = \
     """
@@ -627,7 +647,7 @@ def eyny_download(pyconfig):
     pylib.check_menu_duplicate(pyconfig, SECTION, ch_name, eng_name)
 
     # Open login page
-    driver = pytmp.EynyDriver()
+    driver = pytmp.EynyDriver(timeout=pyconfig.page_timeout(SECTION), limiter=pylib.rate_limiter(pyconfig, SECTION))
     try:
         driver.get(_EYNY_LOGIN)
     except:
@@ -715,20 +735,33 @@ def eyny_download(pyconfig):
         logger.info('Extract file {} success'.format(eng_name))
 
     # Download >> user logout >> close driver
-    driver.download_images(urls)
-    driver.logout()
-    driver.close()
-
-    # Copy temp images to book location
     try:
-        shutil.copytree(driver.dir_path, comic.path['book'])
-    except shutil.Error as err:
-        # Directory are the same
-        logger.warning('Error: {}'.format(err))
-    except OSError as err:
-        logger.warning('Error: {}'.format(err))
-    else:
-        logger.info('Save images to  {} success'.format(comic.path['book']))
+        # Images go straight to book directory, resume from manifest if comic was downloaded before
+        comic.file_path(pyconfig.manifest(SECTION), 'manifest', extension='.csv')
+        try:
+            manifest = pylib.load_manifest(comic.path['manifest'], comic.path['book'])
+        except pycomic_err.FileExistError:
+            logger.warning('Directory {} already exist'.format(comic.path['book']))
+            sys.exit(21)
+
+        # Hand login session of browser to http client
+        client = pylib.configure_client(pyconfig, SECTION, referer=eyny_url)
+        client.set_headers({'User-Agent': driver.user_agent()})
+        client.set_cookies(driver.cookies())
+
+        errors = pylib.download_images(pyconfig, SECTION, urls, comic.path['book'], manifest=manifest,
+                                       log_dir=LOG_DIR)
+    finally:
+        try:
+            driver.logout()
+        except WebDriverException as err:
+            logger.warning('Error: {}'.format(err))
+            logger.info('Failed to log out of eyny')
+        driver.close()
+
+    # Show download error messages
+    for error_message in errors:
+        logger.info(error_message)
     
 
 
@@ -9,20 +9,41 @@ Error Code:
 """
 
 import os, sys
-import random
 import configparser,  pathlib
 import csv, re, shutil
 import datetime, time
+import tempfile
+import concurrent.futures
 import requests
 
+from urllib.parse import urlparse
+
 from PIL import Image
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import (
+    NoSuchElementException, StaleElementReferenceException, TimeoutException
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
 
 from pycomic_pkg import exceptions as pycomic_err
 from pycomic_pkg import logging_class as logcl
 from pycomic_pkg import user_agent_class as agentcl
+from pycomic_pkg import http_class as httpcl
+from pycomic_pkg import rate_limit_class as ratecl
+from pycomic_pkg import manifest_class as manifestcl
+from pycomic_pkg import retry_class as retrycl
+from pycomic_pkg import store_class as storecl
+from pycomic_pkg import page_cache_class as cachecl
+from pycomic_pkg import placeholder_class as placeholdercl
+from pycomic_pkg import job_queue_class as queuecl
+from pycomic_pkg import bandwidth_class as bandwidthcl
+from pycomic_pkg import mirror_class as mirrorcl
+from pycomic_pkg import transfer_stats_class as statscl
+from pycomic_pkg import browser_pool_class as poolcl
+from pycomic_pkg import network_log_class as netcl
+from pycomic_pkg import url_collections as url
 
 
 logger = logcl.PersonalLog('pycomic_class')
@@ -94,15 +115,25 @@ class Driver():
         """
         pass
 
-    def __init__(self, title, url):
-        # self.driver = webdriver.Firefox()
-        options = Options()
-        options.set_headless(True)
-        self.driver = webdriver.Chrome(options=options)
+    def __init__(self, title, url, limiter=None, policy=None, pool=None, timeout=10):
+        """
+        Input:
+            limiter - RateLimiter pacing page requests, also the minimum delay between pages
+            policy - RetryPolicy deciding backoff between page refreshes
+            pool - BrowserPool lending headless browser, shared pool if not given
+                   Image urls are read from network log if pool records it
+            timeout - Seconds to wait for page to become ready
+        """
+        self.pool = pool or poolcl.pool()
+        self.driver = self.pool.acquire()
+        self.network_log = netcl.NetworkLog(self.driver) if self.pool.network_log else None
 
         self.chapter_title = title
         self.chapter_url = url
         self.total_pages = 0
+        self.limiter = limiter or ratecl.RateLimiter()
+        self.policy = policy or retrycl.RetryPolicy(attempts=5)
+        self.timeout = timeout
 
     def get(self):
         """
@@ -110,6 +141,14 @@ class Driver():
         """
         self.driver.get(self.chapter_url)
 
+    def close(self):
+        """
+        Return browser to pool
+        """
+        if self.driver is not None:
+            self.pool.release(self.driver)
+            self.driver = None
+
     def find_last_page(self, last_page_selector):
         """
         Find last page value
@@ -118,9 +157,11 @@ class Driver():
             DriverError - Failed to get last page value
         """
         regex = re.compile(r'\d{1,3}')
-        element = self.driver.find_element_by_css_selector(last_page_selector)
 
         try:
+            locator = (By.CSS_SELECTOR, last_page_selector)
+            element = WebDriverWait(self.driver, self.timeout).until(
+                expected_conditions.presence_of_element_located(locator))
             self.total_pages = int(regex.search(element.text).group())
         except Exception as err:
             raise self.DriverError(err)
@@ -132,11 +173,16 @@ class Driver():
         self.urls = []
 
         for counter in range(self.total_pages):
-            for _ in range(5):
+            for attempt in range(self.policy.attempts):
                 try:
-                    url = self._comic_image_url(image_id)
+                    if self.network_log:
+                        url = self._network_image_url(image_id)
+                    else:
+                        url = self._comic_image_url(image_id)
                     print('Page {} url {}'.format(counter, url))
                 except self.DriverError:
+                    time.sleep(self.policy.delay(attempt))
+                    self.limiter.acquire(self.chapter_url)
                     self.driver.refresh()
                     continue
                 else:
@@ -148,11 +194,17 @@ class Driver():
                 print('Page {} {}'.format(counter, url))
 
             self.urls.append(url)
-            next_page = self.driver.find_element_by_id(next_page_selector)
-            time.sleep(random.uniform(2, 3.5))
-            next_page.click()
+            if counter + 1 == self.total_pages:
+                break
+
+            if not turn_page(self.driver, (By.ID, image_id), next_page_selector, self.limiter, self.policy,
+                             self.timeout):
+                # Same page would be read again, remaining pages are unknown
+                print('Page {} not reached, {}'.format(counter + 1, error_text))
+                self.urls.extend([error_text] * (self.total_pages - counter - 1))
+                break
 
-        self.driver.close()
+        self.close()
 
 
     def page_source(self, js_execute=''):
@@ -163,20 +215,39 @@ class Driver():
             self.driver.execute_script(js_execute)
         
         self.html = self.driver.page_source
-        self.driver.close()
+        self.close()
+
+
+    def _network_image_url(self, image_id):
+        """
+        Image url of current page from browser network log, no new tab is opened
+        Final url after redirects is returned, page src if image response not logged
+        """
+        try:
+            src = wait_image(self.driver, (By.ID, image_id), self.timeout)
+        except Exception as err:
+            raise self.DriverError(err)
 
+        response = self.network_log.wait_response(src, self.timeout)
+        if response is None:
+            # Image served from browser cache is not always logged
+            print('Response of {} not found in network log'.format(src))
+            return src
+
+        image_url, status = response
+        if status >= 400:
+            raise self.DriverError('Respond Code {} of {}'.format(status, image_url))
+        return image_url
 
     def _comic_image_url(self, image_id):
-        source, tag = 'src', 'img'
+        tag = 'img'
 
         try:
-            element = self.driver.find_element_by_id(image_id)
-            webpage = element.get_attribute(source)
+            webpage = wait_image(self.driver, (By.ID, image_id), self.timeout)
             self.driver.execute_script("window.open('{page}');".format(page=webpage))
-            time.sleep(1.2)
+            wait_windows(self.driver, 2, self.timeout)
             self.driver.switch_to.window(self.driver.window_handles[1])
-            image_tag = self.driver.find_element_by_tag_name(tag)
-            image_url = image_tag.get_attribute(source)
+            image_url = wait_image(self.driver, (By.TAG_NAME, tag), self.timeout)
         except Exception as err:
             raise self.DriverError(err)
         finally:
@@ -189,6 +260,91 @@ class Driver():
 
 
 
+def image_src(driver, locator):
+    """
+    Return src of element found by locator, None if element not ready
+    """
+    try:
+        return driver.find_element(*locator).get_attribute('src') or None
+    except (NoSuchElementException, StaleElementReferenceException):
+        return None
+
+
+def wait_image(driver, locator, timeout=10):
+    """
+    Wait until element found by locator has non-empty src
+
+    Parameter:
+        locator - Tuple (By strategy, value)
+    Return:
+        src value of element
+    Error:
+        TimeoutException - Element not ready in timeout seconds
+    """
+    return WebDriverWait(driver, timeout).until(lambda driver: image_src(driver, locator))
+
+
+def wait_windows(driver, count, timeout=10):
+    """
+    Wait until driver has count windows opened
+
+    Error:
+        TimeoutException - Window not opened in timeout seconds
+    """
+    WebDriverWait(driver, timeout).until(expected_conditions.number_of_windows_to_be(count))
+
+
+def wait_page_change(driver, locator, previous_url, previous_src, timeout=10):
+    """
+    Wait until page turn changes url (e.g. fragment) or image src
+    and new image is ready
+
+    Return:
+        True if page changed, False on timeout
+    """
+    def changed(driver):
+        src = image_src(driver, locator)
+        return src is not None and (driver.current_url != previous_url or src != previous_src)
+
+    try:
+        WebDriverWait(driver, timeout).until(changed)
+    except TimeoutException:
+        return False
+    return True
+
+
+def turn_page(driver, locator, next_page_selector, limiter, policy, timeout=10):
+    """
+    Click next page button and wait for page to change
+    Click is tried again with policy backoff if page does not change,
+    unless page changed late in the meantime
+
+    Parameters:
+        locator - Tuple (By strategy, value) of page image
+        next_page_selector - Element id of next page button
+    Return:
+        True if page changed, False if every attempt failed
+    """
+    previous_url, previous_src = driver.current_url, image_src(driver, locator)
+
+    for attempt in range(policy.attempts):
+        if attempt > 0:
+            time.sleep(policy.delay(attempt - 1))
+            if driver.current_url != previous_url or image_src(driver, locator) not in (None, previous_src):
+                return True
+
+        limiter.acquire(previous_url)
+        try:
+            driver.find_element_by_id(next_page_selector).click()
+        except (NoSuchElementException, StaleElementReferenceException):
+            continue
+        if wait_page_change(driver, locator, previous_url, previous_src, timeout):
+            return True
+
+    return False
+
+
+
 class Config():
 
     def __init__(self, candidates):
@@ -223,11 +379,55 @@ class Config():
         self.MAIN_MENU = 'Main-Menu'
         self.ORIGINAL = 'origin'
         self.FORMAT = 'format'
+        self.MANIFEST = 'manifest'
+        self.STORE = 'store'
+        self.PAGE_CACHE = 'page-cache'
+        self.CACHE_TTL = 'cache-ttl'
+        self.PLACEHOLDERS = 'placeholders'
+
+        # Download queue
+        self.QUEUE = 'queue'
+        self.QUEUE_AGING = 'queue-aging'
+        self.QUEUE_BATCH = 'queue-batch'
 
         # For source type - file
         self.RAW = 'raw'
         self.REFINE = 'refine'
 
+        # Download engine
+        self.WORKERS = 'workers'
+        self.HOST_CONNECTIONS = 'host-connections'
+        self.BACKEND = 'backend'
+        self.IN_FLIGHT = 'in-flight'
+
+        # HTTP client
+        self.POOL_SIZE = 'pool-size'
+        self.CONNECT_TIMEOUT = 'connect-timeout'
+        self.READ_TIMEOUT = 'read-timeout'
+
+        # Rate limit
+        self.RATE = 'rate'
+        self.BURST = 'burst'
+        self.HOST_RATE = 'host-rate'
+        self.HOST_BURST = 'host-burst'
+        self.BANDWIDTH = 'bandwidth'
+        self.BANDWIDTH_FILE = 'bandwidth-file'
+
+        # Image mirrors
+        self.MIRRORS = 'mirrors'
+        self.IMAGE_HOST = 'image-host'
+
+        # Selenium browsers
+        self.BROWSERS = 'browsers'
+        self.PAGE_TIMEOUT = 'page-timeout'
+        self.HARVEST = 'harvest'
+        self.CAPTURE = 'capture'
+
+        # Retry policy
+        self.RETRIES = 'retries'
+        self.BACKOFF = 'backoff'
+        self.BACKOFF_CAP = 'backoff-cap'
+
 
         # Get config information
         self._config = configparser.ConfigParser()
@@ -336,6 +536,73 @@ class Config():
         _format = self._read_value(section, self.FORMAT)
         return os.path.join(_directory, _images, _format)
 
+    def manifest(self, section):
+        """
+        Return download manifest directory of configuration
+        Default to manifest if option not set
+        """
+        _directory = self._read_value(section, self.DIRECTORY)
+        _manifest = self._read_optional(section, self.MANIFEST, 'manifest')
+        return os.path.join(_directory, _manifest)
+
+    def store(self, section):
+        """
+        Return content-addressed image store directory of configuration
+        None if option not set or empty, store is disabled
+        """
+        _store = self._read_optional(section, self.STORE, '')
+        if not _store:
+            return None
+        return os.path.join(self._read_value(section, self.DIRECTORY), _store)
+
+    def page_cache(self, section):
+        """
+        Return page cache directory of configuration
+        Default to cache if option not set
+        """
+        _directory = self._read_value(section, self.DIRECTORY)
+        _cache = self._read_optional(section, self.PAGE_CACHE, 'cache')
+        return os.path.join(_directory, _cache)
+
+    def cache_ttl(self, section):
+        """
+        Return seconds cached page is used without revalidation
+        Default to 3600 if option not set
+        """
+        return float(self._read_optional(section, self.CACHE_TTL, 3600))
+
+    def placeholders(self, section):
+        """
+        Return placeholder image registry file path of configuration
+        Default to placeholders.txt if option not set
+        """
+        _directory = self._read_value(section, self.DIRECTORY)
+        _placeholders = self._read_optional(section, self.PLACEHOLDERS, 'placeholders.txt')
+        return os.path.join(_directory, _placeholders)
+
+    def queue(self, section):
+        """
+        Return download queue file path of configuration
+        Default to queue.csv if option not set
+        """
+        _directory = self._read_value(section, self.DIRECTORY)
+        _queue = self._read_optional(section, self.QUEUE, 'queue.csv')
+        return os.path.join(_directory, _queue)
+
+    def queue_aging(self, section):
+        """
+        Return seconds of waiting to raise queued job priority by 1
+        Default to 3600 if option not set
+        """
+        return float(self._read_optional(section, self.QUEUE_AGING, 3600))
+
+    def queue_batch(self, section):
+        """
+        Return number of queued chapters downloaded in one pool
+        Default to 10 if option not set
+        """
+        return int(self._read_optional(section, self.QUEUE_BATCH, 10))
+
     def raw(self, section):
         """
         Return raw url directory of configuration
@@ -354,6 +621,164 @@ class Config():
         _refine = self._read_value(section, self.REFINE)
         return os.path.join(_directory, _links, _refine)
 
+    def workers(self, section):
+        """
+        Return number of download workers of section
+        Default to 4 if option not set
+        """
+        return int(self._read_optional(section, self.WORKERS, 4))
+
+    def host_connections(self, section):
+        """
+        Return maximum concurrent requests to one host of section
+        Default to 2 if option not set
+        """
+        return int(self._read_optional(section, self.HOST_CONNECTIONS, 2))
+
+    def backend(self, section):
+        """
+        Return download backend of section: thread | async
+        Default to thread if option not set
+        """
+        return self._read_optional(section, self.BACKEND, 'thread').lower()
+
+    def in_flight(self, section):
+        """
+        Return maximum requests in flight of async backend
+        Default to 100 if option not set
+        """
+        return int(self._read_optional(section, self.IN_FLIGHT, 100))
+
+    def pool_size(self, section):
+        """
+        Return keep-alive connections kept for each host
+        Default to 10 if option not set
+        """
+        return int(self._read_optional(section, self.POOL_SIZE, 10))
+
+    def connect_timeout(self, section):
+        """
+        Return seconds to wait for connection
+        Default to 10 if option not set
+        """
+        return float(self._read_optional(section, self.CONNECT_TIMEOUT, 10))
+
+    def read_timeout(self, section):
+        """
+        Return seconds to wait for server response
+        Default to 30 if option not set
+        """
+        return float(self._read_optional(section, self.READ_TIMEOUT, 30))
+
+    def rate(self, section):
+        """
+        Return requests per second of section, 0 for unlimited
+        Default to 4 if option not set
+        """
+        return float(self._read_optional(section, self.RATE, 4))
+
+    def burst(self, section):
+        """
+        Return requests allowed at once of section
+        Default to 8 if option not set
+        """
+        return int(self._read_optional(section, self.BURST, 8))
+
+    def host_rate(self, section):
+        """
+        Return requests per second of each host, 0 for unlimited
+        Default to 1 if option not set
+        """
+        return float(self._read_optional(section, self.HOST_RATE, 1))
+
+    def host_burst(self, section):
+        """
+        Return requests allowed at once of each host
+        Default to 2 if option not set
+        """
+        return int(self._read_optional(section, self.HOST_BURST, 2))
+
+    def bandwidth(self, section):
+        """
+        Return bytes per second of image transfer shared by all downloads on host
+        Default to 0 (unlimited) if option not set
+        """
+        return float(self._read_optional(section, self.BANDWIDTH, 0))
+
+    def bandwidth_file(self, section):
+        """
+        Return bandwidth coordination file path shared by pycomic processes
+        Default to pycomic_bandwidth in temporary directory if option not set
+        """
+        return self._read_optional(section, self.BANDWIDTH_FILE,
+                                   os.path.join(tempfile.gettempdir(), 'pycomic_bandwidth'))
+
+    def mirrors(self, section):
+        """
+        Return list of image mirror hosts of section
+        Default to empty list (no failover) if option not set
+        """
+        _mirrors = self._read_optional(section, self.MIRRORS, '')
+        return [host.strip() for host in _mirrors.split(',') if host.strip()]
+
+    def image_host(self, section):
+        """
+        Return image host written into urls decoded from chapter page
+        Default to empty string (site default host) if option not set
+        """
+        return self._read_optional(section, self.IMAGE_HOST, '').strip()
+
+    def browsers(self, section):
+        """
+        Return maximum selenium browsers running at once
+        Default to 2 if option not set
+        """
+        return int(self._read_optional(section, self.BROWSERS, 2))
+
+    def page_timeout(self, section):
+        """
+        Return seconds to wait for browser page to become ready
+        Default to 10 if option not set
+        """
+        return float(self._read_optional(section, self.PAGE_TIMEOUT, 10))
+
+    def harvest(self, section):
+        """
+        Return image url harvest mode of section: tab | network | decode
+        decode reads urls from page script without browser (manhuagui, 999comics)
+        Default to tab if option not set
+        """
+        return self._read_optional(section, self.HARVEST, 'tab').lower()
+
+    def capture(self, section):
+        """
+        Return page image capture mode of url-image: keyboard | devtools
+        devtools writes image bytes loaded by headless browser, keyboard uses save dialog of browser window
+        Default to keyboard if option not set
+        """
+        return self._read_optional(section, self.CAPTURE, 'keyboard').lower()
+
+    def retries(self, section):
+        """
+        Return maximum attempts of each image request
+        Default to 10 if option not set
+        """
+        return int(self._read_optional(section, self.RETRIES, 10))
+
+    def backoff(self, section):
+        """
+        Return seconds of first retry backoff, doubled on each attempt
+        Default to 1 if option not set
+        """
+        return float(self._read_optional(section, self.BACKOFF, 1))
+
+    def backoff_cap(self, section):
+        """
+        Return maximum seconds of retry backoff
+        Default to 60 if option not set
+        """
+        return float(self._read_optional(section, self.BACKOFF_CAP, 60))
+
     def source(self, source=None):
         """
         source argument = None:
@@ -391,8 +816,38 @@ class Config():
             print('- main-menu: {}'.format(self.main_menu(section)))
             print('- origin: {}'.format(self.origin(section)))
             print('- formatted: {}'.format(self.formatted(section)))
+            print('- manifest: {}'.format(self.manifest(section)))
+            print('- store: {}'.format(self.store(section)))
+            print('- page-cache: {}'.format(self.page_cache(section)))
+            print('- cache-ttl: {}'.format(self.cache_ttl(section)))
+            print('- placeholders: {}'.format(self.placeholders(section)))
+            print('- queue: {}'.format(self.queue(section)))
+            print('- queue-aging: {}'.format(self.queue_aging(section)))
+            print('- queue-batch: {}'.format(self.queue_batch(section)))
             print('- raw: {}'.format(self.raw(section)))
-            print('- refine: {}\n'.format(self.refine(section)))
+            print('- refine: {}'.format(self.refine(section)))
+            print('- workers: {}'.format(self.workers(section)))
+            print('- host-connections: {}'.format(self.host_connections(section)))
+            print('- backend: {}'.format(self.backend(section)))
+            print('- in-flight: {}'.format(self.in_flight(section)))
+            print('- pool-size: {}'.format(self.pool_size(section)))
+            print('- connect-timeout: {}'.format(self.connect_timeout(section)))
+            print('- read-timeout: {}'.format(self.read_timeout(section)))
+            print('- rate: {}'.format(self.rate(section)))
+            print('- burst: {}'.format(self.burst(section)))
+            print('- host-rate: {}'.format(self.host_rate(section)))
+            print('- host-burst: {}'.format(self.host_burst(section)))
+            print('- bandwidth: {}'.format(self.bandwidth(section)))
+            print('- bandwidth-file: {}'.format(self.bandwidth_file(section)))
+            print('- mirrors: {}'.format(', '.join(self.mirrors(section))))
+            print('- image-host: {}'.format(self.image_host(section)))
+            print('- browsers: {}'.format(self.browsers(section)))
+            print('- page-timeout: {}'.format(self.page_timeout(section)))
+            print('- harvest: {}'.format(self.harvest(section)))
+            print('- capture: {}'.format(self.capture(section)))
+            print('- retries: {}'.format(self.retries(section)))
+            print('- backoff: {}'.format(self.backoff(section)))
+            print('- backoff-cap: {}\n'.format(self.backoff_cap(section)))
         else:
             self.source()
             self.useragent(section)
@@ -407,8 +862,38 @@ class Config():
             self.main_menu(section)
             self.origin(section)
             self.formatted(section)
+            self.manifest(section)
+            self.store(section)
+            self.page_cache(section)
+            self.cache_ttl(section)
+            self.placeholders(section)
+            self.queue(section)
+            self.queue_aging(section)
+            self.queue_batch(section)
             self.raw(section)
             self.refine(section)
+            self.workers(section)
+            self.host_connections(section)
+            self.backend(section)
+            self.in_flight(section)
+            self.pool_size(section)
+            self.connect_timeout(section)
+            self.read_timeout(section)
+            self.rate(section)
+            self.burst(section)
+            self.host_rate(section)
+            self.host_burst(section)
+            self.bandwidth(section)
+            self.bandwidth_file(section)
+            self.mirrors(section)
+            self.image_host(section)
+            self.browsers(section)
+            self.page_timeout(section)
+            self.harvest(section)
+            self.capture(section)
+            self.retries(section)
+            self.backoff(section)
+            self.backoff_cap(section)
 
 
     def _read_value(self, section, key):
@@ -435,6 +920,25 @@ class Config():
             return _config_value
 
 
+    def _read_optional(self, section, key, fallback):
+        """
+        Get the value of optional key inside section
+        Input:
+            section - config file section
+            key - config file option
+            fallback - value returned if key not set
+        Return:
+            key value
+        Error:
+            pycomic_err.NoSectionError - Section not found
+        """
+        if not self._config.has_section(section):
+            logger.info('Section {} not found in config file'.format(section))
+            raise pycomic_err.NoSectionError
+
+        return self._config.get(section, key, fallback=fallback)
+
+
     def _write_file(self):
         """
         Write config settings to file
@@ -523,6 +1027,13 @@ def check_structure(config, sec_title):
     os.makedirs(config.origin(sec_title), exist_ok=True)
     # Check jpeg directory in books directory
     os.makedirs(config.formatted(sec_title), exist_ok=True)
+    # Check download manifest directory
+    os.makedirs(config.manifest(sec_title), exist_ok=True)
+    # Check page cache directory
+    os.makedirs(config.page_cache(sec_title), exist_ok=True)
+    # Check image store directory
+    if config.store(sec_title):
+        os.makedirs(config.store(sec_title), exist_ok=True)
 
     if not os.path.exists(config.main_menu(sec_title)):
         file = open(config.main_menu(sec_title), mode='wt', encoding='utf-8')
@@ -838,6 +1349,21 @@ def modify_menu(path, target, eng_name=None, ch_name=None, number=None, status=N
         os.remove(bkp_path)
 
 
+def list_images(directory):
+    """
+    Image files in directory, unfinished .part downloads excluded
+
+    Return:
+        Sorted list of filenames
+    Error:
+        Raise FileNotFoundError if directory does not exist
+    """
+    images = [image for image in os.listdir(directory) if not image.endswith('.part')]
+    images.sort()
+
+    return images
+
+
 def verify_images(path):
     """
     Images validation within path directory
@@ -848,8 +1374,7 @@ def verify_images(path):
         Raise FileNotFoundError if path does not exist
     """
     truncated_images = []
-    images = os.listdir(path)
-    images.sort()
+    images = list_images(path)
 
     for image in images:
         try:
@@ -881,46 +1406,904 @@ def make_pdf(input_dir, output_path):
         raise pycomic_err.FileExistError
 
     pages = []
-    images = os.listdir(input_dir)
-    images.sort()
+    images = list_images(input_dir)
 
     for image in images:
         pages.append(Image.open(os.path.join(input_dir, image)))
     pages[0].save(output_path, 'PDF', resolution=100, save_all=True, append_images=pages[1:])
 
 
-def convert_images_jpg(input_dir, output_dir):
+def convert_images_jpg(input_dir, output_dir, store=None):
     """
     Convert images in input_dir to jpeg file format and save to output_dir
 
+    Parameter:
+        store - BlobStore object, converted images are linked to store
     Error:
         Raise IOError with truncated images
     """
-    images = os.listdir(input_dir)
-    images.sort()
+    images = list_images(input_dir)
 
     for image in images:
         img = Image.open(os.path.join(input_dir, image))
-        file = os.path.join(output_dir, datetime.datetime.now().strftime('%Y%m%dT%H%M%SMS%f'))
+        file = os.path.join(output_dir, os.path.splitext(image)[0] + '.jpg')
         img.convert('RGB').save(file, 'JPEG')
+        if store:
+            store.add(file)
+
+
+def rename_pages(directory, manifest=None, extension=None):
+    """
+    Rename images in directory to page index filenames
+    Page index is taken from manifest if given, otherwise from sorted filename order
+
+    Parameters:
+        manifest - Manifest object of directory, recorded filenames are updated
+        extension - Extension of new filenames, None to keep extension of each file
+    Return:
+        Number of renamed images
+    Error:
+        Raise FileNotFoundError if directory does not exist
+    """
+    renames = []
+
+    if manifest is not None and len(manifest):
+        for index in sorted(manifest.pages):
+            page = manifest.pages[index]
+            renames.append((index, page['filename'],
+                            url.page_filename(index, url.url_extension(page['url']))))
+    else:
+        for index, image in enumerate(list_images(directory)):
+            _extension = os.path.splitext(image)[1] if extension is None else extension
+            renames.append((index, image, url.page_filename(index, _extension)))
+
+    renames = [(index, old, new) for index, old, new in renames if old != new]
+
+    # Move to temporary names first, new name may belong to another page
+    moved = []
+    for index, old, new in renames:
+        for suffix in ('', url.PART_SUFFIX):
+            old_path = os.path.join(directory, old + suffix)
+            if os.path.isfile(old_path):
+                os.replace(old_path, os.path.join(directory, old + suffix + '.rename'))
+                moved.append((old + suffix, new + suffix))
+
+    for old, new in moved:
+        os.replace(os.path.join(directory, old + '.rename'), os.path.join(directory, new))
+
+    if manifest is not None:
+        for index, _old, new in renames:
+            manifest.rename(index, new)
+
+    return len([name for name in moved if not name[0].endswith(url.PART_SUFFIX)])
+
+
+def blob_store(config, sec_title):
+    """
+    Image store with settings of sec_title
+
+    Return:
+        BlobStore object, None if store is disabled
+    """
+    if not config.store(sec_title):
+        return None
+    return storecl.BlobStore(config.store(sec_title))
+
+
+def dedup_command(config, sec_title):
+    """
+    Run dedup command of sys.argv for source sec_title
+    """
+    message = \
+    """
+    USAGE:
+        pycomic.py dedup [COMICNAME]
+    NOTE:
+        Link identical images to one copy in image store, store option should be set
+    """
+    if len(sys.argv) > 3:
+        print(message)
+        sys.exit(1)
+    comic_name = sys.argv[2] if len(sys.argv) == 3 else None
+
+    # Chekc config file integrity
+    try:
+        config.config_test(sec_title)
+    except pycomic_err.NoSectionError:
+        sys.exit(102)
+    except pycomic_err.NoOptionError:
+        sys.exit(103)
+
+    # Check directory structure
+    check_structure(config, sec_title)
+
+    # Find comic from menu csv file
+    eng_name = None
+    if comic_name:
+        try:
+            eng_name = find_menu_comic(config, sec_title, comic_name)[0]
+        except pycomic_err.ComicNotFoundError:
+            logger.info('No match to {} found'.format(comic_name))
+            sys.exit(11)
+
+    try:
+        total, saved = dedup_pages(config, sec_title, eng_name)
+    except pycomic_err.NoOptionError:
+        logger.info('Image store not set, set store option in section {}'.format(sec_title))
+        sys.exit(103)
+    except OSError as err:
+        logger.warning('Error: {}'.format(err))
+        logger.info('Failed to link images to store')
+        sys.exit(10)
+
+    logger.info('Dedup {} images, {:.1f} MB saved'.format(total, saved / (1024 * 1024)))
+
+
+def dedup_pages(config, sec_title, comic_name=None):
+    """
+    Link every image of origin and format books of sec_title to image store
+    Digests recorded in chapter manifest are used for origin books
+
+    Parameter:
+        comic_name - English name of comic, None for all comics
+    Return:
+        Tuple: (number of images, bytes saved)
+    Error:
+        pycomic_err.NoOptionError - Image store is disabled
+    """
+    store = blob_store(config, sec_title)
+    if store is None:
+        raise pycomic_err.NoOptionError
+    total, saved = 0, 0
+
+    for root in (config.origin(sec_title), config.formatted(sec_title)):
+        top = os.path.join(root, comic_name) if comic_name else root
+
+        for directory, _dirs, files in os.walk(top):
+            if directory == root or not files:
+                continue
+
+            digests = {}
+            manifest_path = os.path.join(config.manifest(sec_title),
+                                         os.path.relpath(directory, root) + '.csv')
+            if root == config.origin(sec_title) and os.path.isfile(manifest_path):
+                manifest = manifestcl.Manifest(manifest_path)
+                digests = {page['filename']: page['sha256'] for page in manifest.pages.values()
+                           if page['status'] == manifestcl.COMPLETE}
+
+            _total, _saved = store.add_directory(directory, digests)
+            total += _total
+            saved += _saved
+
+    return total, saved
+
+
+def rename_pages_command(config, sec_title):
+    """
+    Run rename-pages command of sys.argv for source sec_title
+    """
+    message = \
+    """
+    USAGE:
+        pycomic.py rename-pages [COMICNAME]
+    NOTE:
+        Rename downloaded and converted images to page index filenames
+    """
+    if len(sys.argv) > 3:
+        print(message)
+        sys.exit(1)
+    comic_name = sys.argv[2] if len(sys.argv) == 3 else None
+
+    # Chekc config file integrity
+    try:
+        config.config_test(sec_title)
+    except pycomic_err.NoSectionError:
+        sys.exit(102)
+    except pycomic_err.NoOptionError:
+        sys.exit(103)
+
+    # Check directory structure
+    check_structure(config, sec_title)
+
+    # Find comic from menu csv file
+    eng_name = None
+    if comic_name:
+        try:
+            eng_name = find_menu_comic(config, sec_title, comic_name)[0]
+        except pycomic_err.ComicNotFoundError:
+            logger.info('No match to {} found'.format(comic_name))
+            sys.exit(11)
+
+    try:
+        results = migrate_pages(config, sec_title, eng_name)
+    except OSError as err:
+        logger.warning('Error: {}'.format(err))
+        logger.info('Failed to rename images')
+        sys.exit(10)
+
+    for directory, renamed in results:
+        logger.info('Rename {} images in {}'.format(renamed, directory))
+    logger.info('Rename images complete')
+
+
+def migrate_pages(config, sec_title, comic_name=None):
+    """
+    Rename every book directory of sec_title to page index filenames
+    Manifest of origin book directory is updated along
+
+    Parameter:
+        comic_name - English name of comic, None for all comics
+    Return:
+        List of (book directory, number of renamed images)
+    """
+    results = []
+
+    for root, extension in ((config.origin(sec_title), None), (config.formatted(sec_title), '.jpg')):
+        top = os.path.join(root, comic_name) if comic_name else root
+
+        for directory, _dirs, files in os.walk(top):
+            if directory == root or not files:
+                continue
+
+            manifest = None
+            if extension is None:
+                manifest_path = os.path.join(config.manifest(sec_title),
+                                             os.path.relpath(directory, root) + '.csv')
+                if os.path.isfile(manifest_path):
+                    manifest = manifestcl.Manifest(manifest_path)
 
+            renamed = rename_pages(directory, manifest, extension)
+            if renamed:
+                results.append((directory, renamed))
 
-def request_page(page_url):
+    return results
+
+
+def request_page(page_url, cache=None):
     """
     Request and parse page_url
 
+    Parameter:
+        cache - PageCache object, page is revalidated instead of downloaded again
     Return:
         BeautifulSoup parsed object
     Error:
         requests.exceptions.HTTPError - Request failed
+        requests.exceptions.RequestException - Connection failed or timed out
     """
-    page_req = requests.get(page_url)
+    if cache:
+        content = cache.get(httpcl.client(), page_url)
+        return BeautifulSoup(content.decode('utf-8', errors='replace'), 'html.parser')
+
+    page_req = httpcl.client().get(page_url)
     page_req.raise_for_status()
     page_req.encoding = 'utf-8'
 
     return BeautifulSoup(page_req.text, 'html.parser')
 
 
+def page_cache(config, sec_title):
+    """
+    Page cache with settings of sec_title
+
+    Return:
+        PageCache object
+    """
+    return cachecl.PageCache(config.page_cache(sec_title), ttl=config.cache_ttl(sec_title))
+
+
+def configure_client(config, sec_title, referer=None):
+    """
+    Set shared http client with settings of sec_title
+    Default headers: User-Agent, Referer
+
+    Return:
+        Shared HTTPClient object
+    """
+    headers = {'User-Agent': config.useragent(sec_title)}
+    if referer:
+        headers['Referer'] = referer
+    elif config.home_url(sec_title).startswith('http'):
+        headers['Referer'] = config.home_url(sec_title)
+
+    return httpcl.configure(headers=headers,
+                            pool_size=max(config.pool_size(sec_title), config.workers(sec_title)),
+                            connect_timeout=config.connect_timeout(sec_title),
+                            read_timeout=config.read_timeout(sec_title))
+
+
+def rate_limiter(config, sec_title):
+    """
+    Shared rate limiter with settings of sec_title
+
+    Return:
+        RateLimiter object
+    """
+    return ratecl.limiter(sec_title,
+                          rate=config.rate(sec_title), burst=config.burst(sec_title),
+                          host_rate=config.host_rate(sec_title), host_burst=config.host_burst(sec_title))
+
+
+def browser_pool(config, sec_title, headless=True, size=None, network_log=False):
+    """
+    Shared selenium browser pool with settings of sec_title
+    Browsers are quit at program exit
+
+    Parameter:
+        size - Pool size, default to browsers option
+        network_log - Browsers record network log for image url harvest
+    Return:
+        BrowserPool object
+    """
+    return poolcl.pool(size or config.browsers(sec_title), headless, network_log)
+
+
+def bandwidth_limiter(config, sec_title):
+    """
+    Bandwidth limiter with settings of sec_title, shared with other pycomic processes
+
+    Return:
+        BandwidthLimiter object
+    """
+    return bandwidthcl.BandwidthLimiter(config.bandwidth(sec_title), path=config.bandwidth_file(sec_title))
+
+
+def mirror_set(config, sec_title, chapters):
+    """
+    Image mirrors of sec_title, measured with first page of chapters
+    Hosts of chapter urls join the set so they can be failed over too
+
+    Return:
+        MirrorSet object, None if mirrors option not set
+    """
+    hosts = config.mirrors(sec_title)
+    if not hosts:
+        return None
+
+    mirrors = mirrorcl.MirrorSet(hosts)
+    for chapter in chapters:
+        for page_url in chapter.urls:
+            mirrors.learn(urlparse(page_url).netloc)
+
+    for chapter in chapters:
+        if chapter.urls:
+            header = chapter.page_headers[0] if chapter.page_headers else None
+            mirrors.probe(httpcl.client(), chapter.urls[0], header)
+            print('Mirror {} selected'.format(mirrors.best()))
+            break
+
+    return mirrors
+
+
+def retry_policy(config, sec_title):
+    """
+    Retry policy with settings of sec_title
+
+    Return:
+        RetryPolicy object
+    """
+    return retrycl.RetryPolicy(attempts=config.retries(sec_title), base=config.backoff(sec_title),
+                               cap=config.backoff_cap(sec_title))
+
+
+def placeholder_registry(config, sec_title):
+    """
+    Placeholder image registry of sec_title
+    Digest of error-url image is learned on first use
+
+    Return:
+        PlaceholderRegistry object
+    """
+    error_url = config.error_url(sec_title)
+    urls = [error_url] if error_url.startswith('http') else []
+    registry = placeholdercl.PlaceholderRegistry(config.placeholders(sec_title), urls)
+
+    try:
+        registry.learn(httpcl.client())
+    except requests.exceptions.RequestException as err:
+        logger.warning('Failed to learn placeholder image {}: {}'.format(error_url, err))
+
+    return registry
+
+
+def job_queue(config, sec_title):
+    """
+    Download queue with settings of sec_title
+
+    Return:
+        JobQueue object
+    """
+    return queuecl.JobQueue(config.queue(sec_title), aging=config.queue_aging(sec_title))
+
+
+def print_jobs(jobs, queue):
+    """
+    Print queued jobs in run order
+    """
+    print('{:>5}  {:<20} {:>5} {:>8} {:>6}  {}'.format('JOB', 'COMIC', 'TAG', 'PRIORITY', 'PAGES', 'STATUS'))
+    for job in jobs:
+        print('{:>5}  {:<20} {:>5} {:>8.1f} {:>6}  {}'.format(job['id'], job['comic'], job['tag'],
+                                                              queue.score(job), job['pages'], job['status']))
+
+
+def queue_command(config, sec_title, log_dir=None, page_headers=None, extension=True, error_level='info'):
+    """
+    Run queue command of sys.argv for source sec_title
+
+    Parameters:
+        log_dir - Directory appended with transfer statistics
+        page_headers, extension - Chapter settings of source, see prepare_chapters
+        error_level - Log level of page error messages, see report_chapters
+    """
+    message = \
+    """
+    USAGE:
+        pycomic.py queue add COMICNAME FILETAG|START-END|all-missing [PRIORITY]
+        pycomic.py queue list
+        pycomic.py queue bump JOBID [AMOUNT]
+        pycomic.py queue cancel JOBID
+        pycomic.py queue run
+    NOTE:
+        Chapters of comics in progress are queued with priority {}
+    """.format(queuecl.ONGOING_PRIORITY)
+    try:
+        action = sys.argv[2]
+    except IndexError:
+        print(message)
+        sys.exit(1)
+
+    # Check directory structure
+    check_structure(config, sec_title)
+    download_queue = job_queue(config, sec_title)
+
+    if action == 'list':
+        print_jobs(download_queue.ordered(sec_title), download_queue)
+
+    elif action in ('bump', 'cancel'):
+        try:
+            job_id = int(sys.argv[3])
+            amount = float(sys.argv[4]) if len(sys.argv) > 4 else 1
+        except (IndexError, ValueError):
+            print(message)
+            sys.exit(1)
+
+        if action == 'bump':
+            found = download_queue.bump(job_id, amount)
+        else:
+            found = download_queue.cancel(job_id)
+        if not found:
+            logger.info('Queued job {} not found'.format(job_id))
+            sys.exit(18)
+        logger.info('Job {} {}'.format(job_id, 'bumped' if action == 'bump' else 'cancelled'))
+
+    elif action == 'add':
+        try:
+            comic_name, selection = sys.argv[3], sys.argv[4]
+            priority = float(sys.argv[5]) if len(sys.argv) > 5 else None
+        except (IndexError, ValueError):
+            print(message)
+            sys.exit(1)
+
+        try:
+            eng_name, ch_name, number, status = find_menu_comic(config, sec_title, comic_name)
+        except pycomic_err.ComicNotFoundError:
+            logger.info('No match to {} found'.format(comic_name))
+            sys.exit(11)
+        if priority is None:
+            priority = queuecl.ONGOING_PRIORITY if status != 'complete' else 0
+
+        comic = Comic(eng_name, ch_name, number)
+        comic.file_path(config.links(sec_title), 'links-dir')
+        try:
+            link_files = dict(list_files(comic.path['links-dir'], ''))
+            request_tags = select_tags(selection, link_files)
+        except ValueError:
+            print(message)
+            sys.exit(1)
+
+        for request_tag in request_tags:
+            comic.file_path(config.links(sec_title), 'links', name=link_files[request_tag])
+            pages = len(url.extract_images(comic.path['links'], duplicates=True, extension=extension))
+            job_id = download_queue.add(sec_title, comic.english, request_tag, priority, pages)
+            if job_id:
+                logger.info('Queue {} {} as job {}'.format(comic.english, request_tag, job_id))
+
+    elif action == 'run':
+        configure_client(config, sec_title)
+
+        while True:
+            jobs = download_queue.ordered(sec_title)[:config.queue_batch(sec_title)]
+            if not jobs:
+                break
+
+            # Prepare chapters of batch, complete and unusable chapters are finished right away
+            owners, chapters = [], []
+            for job in jobs:
+                try:
+                    eng_name, ch_name, number, _status = find_menu_comic(config, sec_title, job['comic'])
+                except pycomic_err.ComicNotFoundError:
+                    logger.info('No match to {} found'.format(job['comic']))
+                    download_queue.finish(job['id'], queuecl.FAILED)
+                    continue
+                comic = Comic(eng_name, ch_name, number)
+                try:
+                    tags, job_chapters, skipped = prepare_chapters(config, sec_title, comic, [job['tag']],
+                                                                   page_headers=page_headers,
+                                                                   extension=extension)
+                except pycomic_err.CSVError as err:
+                    logger.warning(err)
+                    download_queue.finish(job['id'], queuecl.FAILED)
+                    continue
+                if skipped:
+                    download_queue.finish(job['id'], queuecl.FAILED)
+                elif not job_chapters:
+                    download_queue.finish(job['id'], queuecl.DONE)
+                else:
+                    owners.append((job, comic))
+                    chapters.extend(job_chapters)
+
+            # Keep downloaded pages, failed pages are fetched on next run
+            try:
+                errors = download_chapters(config, sec_title, chapters, log_dir=log_dir)
+            except Exception as err:
+                logger.warning(err)
+                sys.exit(41)
+
+            report_chapters([(comic, job['tag']) for job, comic in owners], errors, error_level)
+            for (job, _comic), chapter_errors in zip(owners, errors):
+                download_queue.finish(job['id'], queuecl.FAILED if chapter_errors else queuecl.DONE)
+
+    else:
+        print(message)
+        sys.exit(1)
+
+
+def prepare_chapters(config, sec_title, comic, request_tags, missing_only=False, page_headers=None,
+                     extension=True):
+    """
+    Download chapters of request_tags which are not complete
+    Chapter book directory with images but no manifest is skipped,
+    with missing_only (all-missing) it is downloaded before manifests and counted as present
+
+    Parameters:
+        missing_only - Pass over complete and present chapters without report
+        page_headers - Function of (chapter url, number of pages) returning header of each page,
+                       chapter url is read from comic menu csv file. None to use shared header
+        extension - Links csv file has image urls with extension only, see url.extract_images
+    Return:
+        Tuple: (list of tags to download, list of url.Chapter, list of skipped tags)
+    Error:
+        pycomic_err.CSVError - Failed to read comic menu csv file, page_headers only
+    """
+    tags, chapters, skipped = [], [], []
+    comic.file_path(config.links(sec_title), 'links-dir')
+    link_files = dict(list_files(comic.path['links-dir'], ''))
+    menu_data = None
+    if page_headers:
+        comic.file_path(config.menu(sec_title), 'menu', extension='_menu.csv')
+        menu_data = read_csv(comic.path['menu'])
+
+    for request_tag in request_tags:
+        if request_tag not in link_files or (menu_data is not None and request_tag >= len(menu_data)):
+            logger.info('File Tag {} not found'.format(request_tag))
+            skipped.append(request_tag)
+            continue
+
+        request_file = link_files[request_tag]
+        comic.file_path(config.origin(sec_title), 'book', name=request_file.split('.')[0])
+        comic.file_path(config.links(sec_title), 'links', name=request_file)
+        comic.file_path(config.manifest(sec_title), 'manifest', name=request_file.split('.')[0], extension='.csv')
+
+        try:
+            manifest = load_manifest(comic.path['manifest'], comic.path['book'])
+        except pycomic_err.FileExistError:
+            if missing_only:
+                continue
+            logger.warning('Directory {} already exist'.format(comic.path['book']))
+            skipped.append(request_tag)
+            continue
+
+        urls = url.extract_images(comic.path['links'], duplicates=True, extension=extension)
+        if manifest.all_complete(comic.path['book'], len(urls)):
+            if not missing_only:
+                logger.info('Download {} {} already complete'.format(comic.english, request_tag))
+            continue
+
+        headers = page_headers(menu_data[request_tag][1], len(urls)) if page_headers else None
+        tags.append(request_tag)
+        chapters.append(url.Chapter(urls, comic.path['book'], headers, manifest))
+
+    return tags, chapters, skipped
+
+
+def report_chapters(owners, errors, error_level='info'):
+    """
+    Show download error messages and result of each chapter
+
+    Parameters:
+        owners - List of (Comic, tag) of each chapter
+        errors - List of error message lists of each chapter
+        error_level - Log level of page error messages, e.g. info, warning
+    """
+    log_error = getattr(logger, error_level)
+    for chapter_errors in errors:
+        for error_message in chapter_errors:
+            log_error(error_message)
+
+    for (comic, request_tag), chapter_errors in zip(owners, errors):
+        if chapter_errors:
+            logger.info('Download {} {} incomplete, {} pages failed'.format(comic.english, request_tag,
+                                                                            len(chapter_errors)))
+        else:
+            logger.info('Download {} {} complete'.format(comic.english, request_tag))
+
+
+def load_manifest(manifest_path, book_dir):
+    """
+    Load chapter download manifest and make book directory
+
+    Return:
+        Manifest object
+    Error:
+        pycomic_err.FileExistError - Book directory has images but no manifest
+    """
+    manifest = manifestcl.Manifest(manifest_path)
+    if len(manifest) == 0 and os.path.isdir(book_dir) and list_images(book_dir):
+        raise pycomic_err.FileExistError
+
+    os.makedirs(book_dir, exist_ok=True)
+    return manifest
+
+
+def download_images(config, sec_title, urls, book_dir, manifest=None, page_headers=None, log_dir=None):
+    """
+    Download urls into book_dir with download settings of sec_title
+
+    Parameter:
+        log_dir - Directory appended with transfer statistics, None to print only
+    Return:
+        List of error messages that occur during image download
+    Error:
+        FileNotFoundError - book_dir not found
+    """
+    chapter = url.Chapter(urls, book_dir, page_headers, manifest)
+    return download_chapters(config, sec_title, [chapter], log_dir=log_dir)[0]
+
+
+def download_chapters(config, sec_title, chapters, log_dir=None):
+    """
+    Download pages of every chapter in one worker pool with download settings of sec_title
+    Per host transfer statistics are printed after download
+
+    Parameter:
+        chapters - List of url_collections.Chapter
+        log_dir - Directory appended with transfer statistics, None to print only
+    Return:
+        List of error message lists, one list for each chapter
+    Error:
+        FileNotFoundError - Book directory not found
+    """
+    stats = statscl.TransferStats()
+    if config.backend(sec_title) == 'async':
+        errors = url.run_download_chapters_async(chapters,
+                                                 in_flight=config.in_flight(sec_title),
+                                                 host_connections=config.host_connections(sec_title),
+                                                 limiter=rate_limiter(config, sec_title),
+                                                 policy=retry_policy(config, sec_title),
+                                                 placeholders=placeholder_registry(config, sec_title),
+                                                 bandwidth=bandwidth_limiter(config, sec_title),
+                                                 mirrors=mirror_set(config, sec_title, chapters),
+                                                 stats=stats)
+    else:
+        errors = url.download_chapters(chapters,
+                                       workers=config.workers(sec_title),
+                                       host_connections=config.host_connections(sec_title),
+                                       limiter=rate_limiter(config, sec_title),
+                                       policy=retry_policy(config, sec_title),
+                                       placeholders=placeholder_registry(config, sec_title),
+                                       bandwidth=bandwidth_limiter(config, sec_title),
+                                       mirrors=mirror_set(config, sec_title, chapters),
+                                       stats=stats)
+
+    # Link completed pages to image store
+    store = blob_store(config, sec_title)
+    if store:
+        for chapter in chapters:
+            if chapter.manifest is None:
+                continue
+            for page in chapter.manifest.pages.values():
+                page_path = os.path.join(chapter.directory, page['filename'])
+                if page['status'] == manifestcl.COMPLETE and os.path.isfile(page_path):
+                    store.add(page_path, page['sha256'])
+
+    report_transfers(stats, sec_title, log_dir)
+    return errors
+
+
+def report_transfers(stats, sec_title, log_dir=None):
+    """
+    Print per host transfer statistics
+    and append them to transfers json lines file of log_dir
+    """
+    stats.print_summary()
+    if not log_dir:
+        return
+
+    stats_path = os.path.join(log_dir, '{}-transfers.jsonl'.format(datetime.date.today().strftime('%Y-%m')))
+    try:
+        stats.dump(stats_path, section=sec_title, command=' '.join(sys.argv[1:]))
+    except OSError as err:
+        logger.warning('Failed to write transfer statistics {}: {}'.format(stats_path, err))
+
+
+def fetch_chapter_urls(config, sec_title, chapters, image_id, last_page_selector, next_page_selector,
+                       workers=1):
+    """
+    Harvest image urls of chapters, each chapter in own headless browser of shared pool
+    Links csv file of chapter is written as soon as the chapter finishes
+    With harvest option network, urls are read from browser network log
+
+    Parameters:
+        chapters - List of tuple (chapter title, chapter url, links csv path)
+        image_id - Element id of page image
+        workers - Number of chapters harvested at once
+    Return:
+        List of exit code for each chapter, 0 on success
+    """
+    limiter = rate_limiter(config, sec_title)
+    pool = browser_pool(config, sec_title, size=workers, network_log=config.harvest(sec_title) == 'network')
+    error_text = config.error_url(sec_title)
+    timeout = config.page_timeout(sec_title)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = [
+            executor.submit(_fetch_chapter, title, chapter_url, links_path, image_id, last_page_selector,
+                            next_page_selector, error_text, limiter, pool, timeout)
+            for title, chapter_url, links_path in chapters
+        ]
+
+    return [future.result() for future in futures]
+
+
+def _fetch_chapter(title, chapter_url, links_path, image_id, last_page_selector, next_page_selector,
+                   error_text, limiter, pool, timeout):
+    """
+    Harvest image urls of single chapter of fetch_chapter_urls
+
+    Return:
+        Exit code, 0 on success
+    """
+    try:
+        driver = Driver(title, chapter_url, limiter=limiter, pool=pool, timeout=timeout)
+    except Exception as err:
+        logger.warning('Error: {}'.format(err))
+        logger.info('Failed to start browser for {}'.format(title))
+        return 3
+
+    try:
+        try:
+            driver.get()
+        except Exception:
+            logger.info('Driver failed to request {}'.format(chapter_url))
+            return 3
+
+        try:
+            driver.find_last_page(last_page_selector)
+        except Driver.DriverError as err:
+            logger.warning('Error: {}'.format(err))
+            logger.info('Failed to get last page value of {}'.format(title))
+            return 32
+
+        driver.get_urls(image_id, next_page_selector, error_text=error_text)
+    finally:
+        driver.close()
+
+    return write_links(links_path, driver.urls)
+
+
+def decode_chapters(config, sec_title, chapters, decode, workers=1):
+    """
+    Decode image urls of chapters from chapter page without browser
+    and write links csv file of each chapter
+
+    Parameters:
+        chapters - List of tuple (chapter title, chapter url, links csv path)
+        decode - Function of page html returning list of image urls,
+                 raise pycomic_err.DecodeError if page can not be decoded
+        workers - Number of chapters requested at once
+    Return:
+        List of exit code for each chapter, None if chapter could not be decoded
+    """
+    configure_client(config, sec_title)
+    limiter = rate_limiter(config, sec_title)
+
+    def decode_chapter(chapter):
+        chapter_title, chapter_url, links_path = chapter
+        limiter.acquire(chapter_url)
+        try:
+            urls = decode(str(request_page(chapter_url)))
+        except requests.exceptions.RequestException as err:
+            logger.warning('Error: {}'.format(err))
+            logger.info('Failed to request {}, fall back to browser'.format(chapter_url))
+            return None
+        except pycomic_err.DecodeError as err:
+            logger.warning('Error: {}'.format(err))
+            logger.info('Failed to decode {}, fall back to browser'.format(chapter_title))
+            return None
+
+        print('Chapter {} decoded, {} pages'.format(chapter_title, len(urls)))
+        return write_links(links_path, urls)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        return list(executor.map(decode_chapter, chapters))
+
+
+def write_links(links_path, urls):
+    """
+    Write image urls of chapter to links csv file
+
+    Return:
+        Exit code, 0 on success
+    """
+    os.makedirs(os.path.dirname(links_path), exist_ok=True)
+    try:
+        write_csv(links_path, urls, index=True)
+    except pycomic_err.CSVError as err:
+        logger.warning('Error: {}'.format(err))
+        logger.info('Failed to write to {}'.format(links_path))
+        if os.path.isfile(links_path):
+            os.remove(links_path)
+        return 16
+
+    logger.info('Write file {} success'.format(links_path))
+    return 0
+
+
+def pop_option(args, option, fallback=None):
+    """
+    Remove option and its value from argument list
+
+    Return:
+        Value of option, fallback if option not given
+    Error:
+        IndexError - Option has no value
+    """
+    if option not in args:
+        return fallback
+
+    position = args.index(option)
+    value = args[position + 1]
+    del args[position:position + 2]
+    return value
+
+
+def select_tags(selection, tags):
+    """
+    Select FILETAG values from selection argument
+
+    Parameters:
+        selection - FILETAG, range START-END, comma separated list of both, or all-missing
+        tags - Available FILETAG values
+    Return:
+        Sorted list of selected FILETAG values, all-missing selects every tag
+    Error:
+        ValueError - selection format not valid
+    """
+    if selection == 'all-missing':
+        return sorted(tags)
+
+    selected = set()
+    for part in selection.split(','):
+        start, _sep, end = part.partition('-')
+        start = int(start)
+        end = int(end) if end else start
+        if start > end:
+            raise ValueError('Range {} not valid'.format(part))
+        selected.update(tag for tag in tags if start <= tag <= end)
+
+    return sorted(selected)
+
+
 def get_source(config):
     """
     Get config file source value
@@ -7,6 +7,7 @@ Author:
 Error Code:
     1 - Program usage error
     3 - Webpage request error
+    10 - OSError catch
     11 - ComicNotFoundError catch
     12 - UpdateError catch
     13 - FileNotFoundError catch
@@ -16,10 +17,11 @@ Error Code:
     31 - HTTPError catch
     32 - DriverError catch
     33 - urlError catch
+    41 - Download images error
 """
 
 import sys, os
-import csv, shutil, datetime
+import csv, shutil
 import requests
 import re
 
@@ -27,9 +29,9 @@ from selenium import webdriver
 from bs4 import BeautifulSoup
 
 from . import exceptions as pycomic_err
-from . import url_collections as url
 from . import logging_class as logcl
 from . import pycomic_lib as pylib
+from . import manhuagui_decoder as decoder
 
 from . import pycomic_tmp as pytmp
 
@@ -46,10 +48,11 @@ def help():
     USAGE:
         pycomic.py add ENGLISHNAME CHINESENAME NUMBER
         pycomic.py convert-image COMICNAME FILETAG
-        pycomic.py download COMICNAME FILETAG 
+        pycomic.py dedup [COMICNAME]
+        pycomic.py download COMICNAME FILETAG|START-END|all-missing
         pycomic.py error-url COMICNAME IDENTITYNUM
         pycomic.py fetch-menu COMICNAME
-        pycomic.py fetch-url COMICNAME IDENTITYNUM
+        pycomic.py fetch-url COMICNAME IDENTITYNUM|START-END [--workers N]
         pycomic.py help
         pycomic.py list [PATTERN]
         pycomic.py list-books origin|format COMICNAME [PATTERN]
@@ -57,9 +60,11 @@ def help():
         pycomic.py list-pdf COMICNAME [PATTERN]
         pycomic.py list-url COMICNAME [PATTERN]
         pycomic.py make-pdf COMICNAME FILETAG
+        pycomic.py queue add|list|bump|cancel|run
+        pycomic.py rename-pages [COMICNAME]
         pycomic.py source [file|999comics|manhuagui]
         pycomic.py state-change COMICNAME
-        pycomic.py url-image COMICNAME IDENTITYNUM
+        pycomic.py url-image COMICNAME IDENTITYNUM|START-END [--workers N]
         pycomic.py verify-image COMICNAME FILETAG
         pycomic.py version
     """
@@ -170,7 +175,8 @@ def convert_image(pyconfig):
         sys.exit(21)
 
     try:
-        pylib.convert_images_jpg(comic.path['origin'], comic.path['format'])
+        pylib.convert_images_jpg(comic.path['origin'], comic.path['format'],
+                                 store=pylib.blob_store(pyconfig, SECTION))
     except IOError:
         logger.warning('Failed to convert {} to jpeg files'.format(comic.path['origin']))
         shutil.rmtree(comic.path['format'])
@@ -179,17 +185,22 @@ def convert_image(pyconfig):
         logger.info('Convert {} to jpeg files success'.format(comic.path['origin']))
 
 
+def dedup(pyconfig):
+    pylib.dedup_command(pyconfig, SECTION)
+
+
 def download(pyconfig):
     message = \
     """
     USAGE:
-        pycomic.py download COMICNAME FILETAG
+        pycomic.py download COMICNAME FILETAG|START-END|all-missing
     NOTE:
         use 'pycomic.py list-url' command to get FILETAG value
+        Multiple FILETAG can be separated by comma, e.g. 1,5,10-80
     """
     try:
         comic_name = sys.argv[2]
-        request_tag = int(sys.argv[3])
+        selection = sys.argv[3]
     except IndexError:
         print(message)
         sys.exit(1)
@@ -206,76 +217,50 @@ def download(pyconfig):
     pylib.check_structure(pyconfig, SECTION)
 
     # Find comic from menu csv file
-    try:
-        eng_name, ch_name, number, _status = pylib.find_menu_comic(pyconfig, SECTION, comic_name)
-    except pycomic_err.ComicNotFoundError:
-        logger.info('No match to {} found'.format(comic_name))
-        sys.exit(11)
+    eng_name, ch_name, number, _status = _check_comic_existence(pyconfig, comic_name)
 
     # Define comic object
     comic = pylib.Comic(eng_name, ch_name, number)
-    comic.file_path(pyconfig.menu(SECTION), 'menu', extension='_menu.csv')
     comic.file_path(pyconfig.links(SECTION), 'links-dir')
+    # Get request tags
+    try:
+        request_tags = pylib.select_tags(selection, dict(pylib.list_files(comic.path['links-dir'], '')))
+    except ValueError:
+        print(message)
+        sys.exit(1)
+    if not request_tags:
+        logger.info('File Tag {} not found'.format(selection))
+        sys.exit(18)
 
-    # Get request referer value
+    # Queue every chapter which is not complete, resume from manifest if downloaded before
     try:
-        comic_data = pylib.index_data(comic.path['menu'], request_tag)
+        tags, chapters, skipped = pylib.prepare_chapters(pyconfig, SECTION, comic, request_tags,
+                                                         missing_only=selection == 'all-missing',
+                                                         page_headers=_page_headers, extension=False)
     except pycomic_err.CSVError as err:
         logger.warning(err)
         logger.info('Failed to read file {}'.format(comic.path['menu']))
         sys.exit(16)
-    except pycomic_err.DataIndexError:
-        logger.info('File Tag {} not found'.format(request_tag))
-        sys.exit(18)
-    else:
-        referer = comic_data[1]
+    if not chapters:
+        if skipped:
+            sys.exit(10)
+        return
 
-    # Get request tag's filename
+    # Keep downloaded pages, failed pages are fetched on next run
+    pylib.configure_client(pyconfig, SECTION)
     try:
-        request_file = pylib.index_data(comic.path['links-dir'], request_tag, file=False)
-    except pycomic_err.CSVError as err:
+        errors = pylib.download_chapters(pyconfig, SECTION, chapters, log_dir=LOG_DIR)
+    except Exception as err:
         logger.warning(err)
-        logger.info('Failed to list directory {}'.format(comic.path['links-dir']))
-        sys.exit(16)
-    except pycomic_err.DataIndexError:
-        logger.info('File Tag {} not found'.format(request_tag))
-        sys.exit(18)
+        sys.exit(41)
 
-    comic.file_path(pyconfig.origin(SECTION), 'book', name=request_file.split('.')[0])
-    comic.file_path(pyconfig.links(SECTION), 'links', name=request_file)
+    pylib.report_chapters([(comic, tag) for tag in tags], errors, error_level='warning')
 
-    # Download images
-    try:
-        os.makedirs(comic.path['book'])
-    except OSError:
-        logger.warning('Directory {} already exist'.format(comic.path['book']))
+    if any(errors):
+        sys.exit(33)
+    if skipped:
         sys.exit(10)
 
-    urls = url.extract_images(comic.path['links'], duplicates=True, extension=False)
-    user_agent = pyconfig.useragent(SECTION)
-
-    # Remove book directory if error occur when downloading images
-    for index, each_url in enumerate(urls):
-        header = {'User-Agent': user_agent, 'Referer': referer + '#p={}'.format(index + 1)}
-        try:
-            filename = datetime.datetime.now().strftime('%Y%m%dT%H%M%SMS%f')
-            url.download_image(each_url, os.path.join(comic.path['book'], filename), header=header)
-        except ReferenceError as err:
-            logger.warning(err)
-            shutil.rmtree(comic.path['book'])
-            sys.exit(33)
-        except Exception as err:
-            logger.warning(err)
-            shutil.rmtree(comic.path['book'])
-            sys.exit(41)
-        
-    # Show download error messages
-    # for error_message in errors:
-        # logger.info(error_message)
-
-    # Download success
-    logger.info('Download {} {} complete'.format(comic.english, request_tag))
-
     
 def error_url(pyconfig):
     message = \
@@ -358,7 +343,8 @@ def fetch_menu(pyconfig):
     js_code = 'var elements = document.querySelectorAll("#chapter-list-1 ul"); \
         elements.forEach(function(elem) {elem.style.display = "block";});'
 
-    driver = pylib.Driver(eng_name, comic.path['site-url'])
+    driver = pylib.Driver(eng_name, comic.path['site-url'], limiter=pylib.rate_limiter(pyconfig, SECTION),
+                          pool=pylib.browser_pool(pyconfig, SECTION), timeout=pyconfig.page_timeout(SECTION))
     driver.get()
     driver.page_source(js_execute=js_code)
 
@@ -404,14 +390,18 @@ def fetch_url(pyconfig):
     message = \
     """
     USAGE:
-        pycomic.py fetch-url COMICNAME IDENTITYNUM
+        pycomic.py fetch-url COMICNAME IDENTITYNUM|START-END [--workers N]
     NOTE:
         Use 'pycomic.py list-menu' command to get IDENTITYNUM
-    """ 
+        Multiple IDENTITYNUM can be separated by comma, e.g. 1,5,10-50
+        --workers N harvests N chapters at once in separate headless browsers
+    """
     try:
-        comic_name = sys.argv[2]
-        request_identity = int(sys.argv[3])
-    except:
+        args = sys.argv[2:]
+        workers = pylib.pop_option(args, '--workers')
+        workers = int(workers) if workers is not None else None
+        comic_name, selection = args[0], args[1]
+    except (IndexError, ValueError):
         print(message)
         sys.exit(1)
 
@@ -423,62 +413,64 @@ def fetch_url(pyconfig):
     except pycomic_err.NoOptionError:
         sys.exit(103)
 
+    # Default workers from config, read after section is checked
+    if workers is None:
+        workers = pyconfig.browsers(SECTION)
+
     # Check directory structure
     pylib.check_structure(pyconfig, SECTION)
 
     # Find comic from menu csv file
     eng_name, ch_name, number, _status = _check_comic_existence(pyconfig, comic_name)
-    
+
     # Define comic object
     comic = pylib.Comic(eng_name, ch_name, number)
     comic.file_path(pyconfig.menu(SECTION), 'menu', extension='_menu.csv')
     # Read comic URL from COMICNAME_menu.csv file
     try:
-        comic_data = pylib.index_data(comic.path['menu'], request_identity)
+        menu = pylib.read_csv(comic.path['menu'])
     except pycomic_err.CSVError as err:
         logger.warning(err)
         logger.info('Failed to read file {}'.format(comic.path['menu']))
         sys.exit(16)
-    except pycomic_err.DataIndexError:
-        logger.info('Identity Number {} not found'.format(request_identity))
-        sys.exit(18)
-
-    driver = pylib.Driver(comic_data[0], comic_data[1])
 
-    # comic.chapter_title, comic.url = comic_data[0], comic_data[1]
-    comic.file_path(pyconfig.links(SECTION), 'links', name=comic.english, extension='_{}.csv'.format(driver.chapter_title))
-    comic.file_path(pyconfig.links(SECTION), 'links-dir')
-
-    # Start selenium driver
-    try:
-        driver.get()
-    except:
-        logger.info('Driver failed to request {}'.format(driver.chapter_url))
-        sys.exit(3)
-
-    # Information parsing
     try:
-        driver.find_last_page('#pageSelect option:nth-last-child(1)')
-    except pylib.Driver.DriverError as err:
-        logger.warning('Error: {}'.format(err))
-        logger.info('Failed to get last page value')
-        sys.exit(32)
-
-    # Fetch urls
-    driver.get_urls('mangaFile', 'next', error_text=pyconfig.error_url(SECTION))
-
-    # Write to csv file
-    os.makedirs(comic.path['links-dir'], exist_ok=True)
-    try:
-        pylib.write_csv(comic.path['links'], driver.urls, index=True)
-    except pycomic_err.CSVError as err:
-        logger.warning('Error" {}'.format(err))
-        logger.info('Failed to write to {}'.format(comic.path['links']))
+        request_identities = pylib.select_tags(selection, range(len(menu)))
+    except ValueError:
+        print(message)
+        sys.exit(1)
+    if not request_identities:
+        logger.info('Identity Number {} not found'.format(selection))
+        sys.exit(18)
 
-        os.remove(comic.path['links'])
-        sys.exit(16)
-    else:
-        logger.info('Write file {} success'.format(comic.path['links']))
+    # Links csv file of each chapter
+    chapters = []
+    for identity in request_identities:
+        chapter_title, chapter_url = menu[identity][0], menu[identity][1]
+        comic.file_path(pyconfig.links(SECTION), 'links', name=comic.english, extension='_{}.csv'.format(chapter_title))
+        chapters.append((chapter_title, chapter_url, comic.path['links']))
+
+    # Decode urls from chapter page without browser if harvest option is decode
+    codes = [None] * len(chapters)
+    if pyconfig.harvest(SECTION) == 'decode':
+        host = pyconfig.image_host(SECTION) or decoder.IMAGE_HOST
+        codes = pylib.decode_chapters(pyconfig, SECTION, chapters, lambda html: decoder.chapter_urls(html, host),
+                                      workers=workers)
+
+    # Fetch urls of chapters not decoded, chapters are spread across browsers
+    remain = [index for index, code in enumerate(codes) if code is None]
+    if remain:
+        remain_codes = pylib.fetch_chapter_urls(pyconfig, SECTION, [chapters[index] for index in remain],
+                                                'mangaFile', '#pageSelect option:nth-last-child(1)', 'next',
+                                                workers=workers)
+        for index, code in zip(remain, remain_codes):
+            codes[index] = code
+
+    failed = [(identity, code) for identity, code in zip(request_identities, codes) if code]
+    for identity, code in failed:
+        logger.info('Identity Number {} failed'.format(identity))
+    if failed:
+        sys.exit(failed[0][1])
 
 
 def list(pyconfig):
@@ -798,6 +790,15 @@ def state_change(pyconfig):
     else:
         logger.info('{} marked as process complete'.format(comic_name))
 
+def queue(pyconfig):
+    pylib.queue_command(pyconfig, SECTION, log_dir=LOG_DIR, page_headers=_page_headers,
+                        extension=False, error_level='warning')
+
+
+def rename_pages(pyconfig):
+    pylib.rename_pages_command(pyconfig, SECTION)
+
+
 def source(pyconfig):
     message = \
     """
@@ -825,16 +826,20 @@ def url_image(pyconfig):
     message = \
     """
     USAGE:
-        pycomic.py url-image COMICNAME IDENTITYNUM
+        pycomic.py url-image COMICNAME IDENTITYNUM|START-END [--workers N]
     NOTE:
         Temporary function to substitutew download, which is not working at the moment
+        Multiple IDENTITYNUM can be separated by comma, e.g. 1,5,10-50
+        --workers N captures N chapters at once in headless browsers, capture option devtools only
     """
     try:
-        comic_name = sys.argv[2]
-        request_identity = int(sys.argv[3])
-    except:
+        args = sys.argv[2:]
+        workers = pylib.pop_option(args, '--workers')
+        workers = int(workers) if workers is not None else None
+        comic_name, selection = args[0], args[1]
+    except (IndexError, ValueError):
         print(message)
-        sys.exit(1)    
+        sys.exit(1)
 
     # Chekc config file integrity
     try:
@@ -844,6 +849,10 @@ def url_image(pyconfig):
     except pycomic_err.NoOptionError:
         sys.exit(103)
 
+    # Default workers from config, read after section is checked
+    if workers is None:
+        workers = pyconfig.browsers(SECTION)
+
     # Check directory structure
     pylib.check_structure(pyconfig, SECTION)
 
@@ -855,66 +864,41 @@ def url_image(pyconfig):
     comic.file_path(pyconfig.menu(SECTION), 'menu', extension='_menu.csv')
     # Read comic URL from COMICNAME_menu.csv file
     try:
-        comic_data = pylib.index_data(comic.path['menu'], request_identity)
+        menu = pylib.read_csv(comic.path['menu'])
     except pycomic_err.CSVError as err:
         logger.warning(err)
         logger.info('Failed to read file {}'.format(comic.path['menu']))
         sys.exit(16)
-    except pycomic_err.DataIndexError:
-        logger.info('Identity Number {} not found'.format(request_identity))
-        sys.exit(18)
 
-    driver = pytmp.Driver(comic_data[0], comic_data[1])
-
-    # comic.chapter_title, comic.url = comic_data[0], comic_data[1]
-    comic.file_path(pyconfig.links(SECTION), 'links', name=comic.english, extension='_{}.csv'.format(driver.chapter_title))
-    comic.file_path(pyconfig.links(SECTION), 'links-dir')
-    comic.file_path(pyconfig.origin(SECTION), 'book', name=comic.english, extension='_{}'.format(driver.chapter_title))
-
-    # Start selenium driver
     try:
-        driver.get()
-    except:
-        logger.info('Driver failed to request {}'.format(driver.chapter_url))
-        sys.exit(3)
+        request_identities = pylib.select_tags(selection, range(len(menu)))
+    except ValueError:
+        print(message)
+        sys.exit(1)
+    if not request_identities:
+        logger.info('Identity Number {} not found'.format(selection))
+        sys.exit(18)
 
-    # Information parsing
-    try:
-        driver.find_last_page('#pageSelect option:nth-last-child(1)')
-    except pylib.Driver.DriverError as err:
-        logger.warning('Error: {}'.format(err))
-        logger.info('Failed to get last page value')
-        sys.exit(32)
+    # Links csv file, book directory and manifest of each chapter
+    chapters = []
+    for identity in request_identities:
+        chapter_title, chapter_url = menu[identity][0], menu[identity][1]
+        comic.file_path(pyconfig.links(SECTION), 'links', name=comic.english, extension='_{}.csv'.format(chapter_title))
+        comic.file_path(pyconfig.origin(SECTION), 'book', name=comic.english, extension='_{}'.format(chapter_title))
+        comic.file_path(pyconfig.manifest(SECTION), 'manifest', name=comic.english,
+                        extension='_{}.csv'.format(chapter_title))
+        chapters.append((chapter_title, chapter_url, comic.path['links'], comic.path['book'],
+                         comic.path['manifest']))
 
-    # Fetch urls and download images
-    driver.get_urls_and_images('mangaFile', 'next')
+    # Fetch urls and save images
+    codes = pytmp.image_chapters(pyconfig, SECTION, chapters, 'mangaFile', '#pageSelect option:nth-last-child(1)',
+                                 'next', workers=workers)
 
-    # Write to csv file
-    os.makedirs(comic.path['links-dir'], exist_ok=True)
-    try:
-        pylib.write_csv(comic.path['links'], driver.urls, index=True)
-    except pycomic_err.CSVError as err:
-        logger.warning('Error" {}'.format(err))
-        logger.info('Failed to write to {}'.format(comic.path['links']))
-
-        os.remove(comic.path['links'])
-        sys.exit(16)
-    else:
-        logger.info('Write file {} success'.format(comic.path['links']))
-
-    # Copy temp images to book location
-    try:
-        shutil.copytree(driver.dir_path, comic.path['book'])
-    except shutil.Error as err:
-        # Directory are the same
-        logger.warning('Error: {}'.format(err))
-        # print('Error: {}'.format(err))
-    except OSError as err:
-        logger.warning('Error: {}'.format(err))
-        # print('Error: {}'.format(err))
-    else:
-        logger.info('Save images to {} success'.format(comic.path['book']))
-        # print('Save images to {} success'.format(comic.path['book']))
+    failed = [(identity, code) for identity, code in zip(request_identities, codes) if code]
+    for identity, code in failed:
+        logger.info('Identity Number {} failed'.format(identity))
+    if failed:
+        sys.exit(failed[0][1])
 
 
 def verify_image(pyconfig):
@@ -978,6 +962,13 @@ def verify_image(pyconfig):
     logger.info('{} {} verification completed'.format(comic_name, request_tag))
 
 
+def _page_headers(chapter_url, total):
+    """
+    Referer of each page, manhuagui refuses image request without page referer
+    """
+    return [{'Referer': chapter_url + '#p={}'.format(index + 1)} for index in range(total)]
+
+
 def _check_comic_existence(config, comic_name):
     """
     Find comic from menu csv file
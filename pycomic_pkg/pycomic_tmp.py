@@ -7,12 +7,44 @@ Author:
 
 import os
 import re, shutil
-import random
-import datetime, time
-import pyautogui, pyperclip
+import time
+import base64
+import hashlib
+import concurrent.futures
 
 from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+
+from pycomic_pkg import exceptions as pycomic_err
+from pycomic_pkg import logging_class as logcl
+from pycomic_pkg import manifest_class as manifestcl
+from pycomic_pkg import rate_limit_class as ratecl
+from pycomic_pkg import retry_class as retrycl
+from pycomic_pkg import browser_pool_class as poolcl
+from pycomic_pkg import network_log_class as netcl
+from pycomic_pkg import pycomic_lib as pylib
+from pycomic_pkg import url_collections as url
+
+
+logger = logcl.PersonalLog('pycomic_tmp')
+
+# Read image bytes of current document, run in tab of image url so request is same origin
+_FETCH_IMAGE_SCRIPT = """
+var done = arguments[arguments.length - 1];
+fetch(arguments[0]).then(function (response) {
+    if (!response.ok) { throw new Error('Status ' + response.status); }
+    return response.arrayBuffer();
+}).then(function (buffer) {
+    var bytes = new Uint8Array(buffer), binary = '';
+    for (var i = 0; i < bytes.length; i += 32768) {
+        binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 32768));
+    }
+    done(btoa(binary));
+}).catch(function (err) { done({'error': String(err)}); });
+"""
 
 
 class Driver():
@@ -23,73 +55,116 @@ class Driver():
         """
         pass
 
-    def __init__(self, title, url):
-        options = Options()
-        options.set_headless(False)
-        self.driver = webdriver.Chrome()
+    def __init__(self, title, url, limiter=None, policy=None, pool=None, timeout=10, capture=False):
+        """
+        Input:
+            capture - Write image bytes loaded by browser to file, browser can be headless
+                      Otherwise image is saved with keyboard, browser window is required
+        """
+        self.capture = capture
+        self.pool = pool or poolcl.pool(headless=capture, network_log=capture)
+        self.driver = self.pool.acquire()
+        self.network_log = netcl.NetworkLog(self.driver) if self.pool.network_log else None
 
         self.chapter_title = title
         self.chapter_url = url
         self.total_page = 0
+        self.limiter = limiter or ratecl.RateLimiter()
+        self.policy = policy or retrycl.RetryPolicy(attempts=5)
+        self.timeout = timeout
 
         self.dir_path = '/tmp/pycomic'
+        self.manifest = None
 
     def get(self):
         self.driver.get(self.chapter_url)
 
+    def close(self):
+        if self.driver is not None:
+            self.pool.release(self.driver)
+            self.driver = None
+
     def find_last_page(self, last_page_selector):
         regex = re.compile(r'\d{1,3}')
-        element = self.driver.find_element_by_css_selector(last_page_selector)
 
         try:
+            locator = (By.CSS_SELECTOR, last_page_selector)
+            element = WebDriverWait(self.driver, self.timeout).until(
+                expected_conditions.presence_of_element_located(locator))
             self.total_pages = int(regex.search(element.text).group())
         except Exception as err:
             raise self.DriverError(err)
 
-    def get_urls_and_images(self, image_id, next_page_selector, error_text='URL error occurs'):
+    def get_urls_and_images(self, image_id, next_page_selector, error_text='URL error occurs', dir_path=None,
+                            manifest=None):
+        """
+        Input:
+            dir_path - Capture mode writes images to dir_path, e.g. book directory
+                       Pages already in directory are replaced, other files are kept
+            manifest - Manifest object updated with captured pages, capture mode only
+        """
         self.urls = []
+        self.manifest = manifest
 
-        # Temporary save location
-        if os.path.isdir(self.dir_path):
-            shutil.rmtree(self.dir_path)
-        os.mkdir(self.dir_path)
+        if self.capture:
+            self.dir_path = dir_path or self.dir_path
+            os.makedirs(self.dir_path, exist_ok=True)
+        else:
+            # Temporary save location
+            if os.path.isdir(self.dir_path):
+                shutil.rmtree(self.dir_path)
+            os.mkdir(self.dir_path)
 
         for counter in range(self.total_pages):
-            for _ in range(5):
+            for attempt in range(self.policy.attempts):
                 try:
-                    url = self._comic_image_url(image_id)
-                    print('Page {} url {}'.format(counter, url))
+                    if self.capture:
+                        image_url = self._capture_image(image_id, counter)
+                    else:
+                        image_url = self._comic_image_url(image_id, counter)
+                    print('Page {} url {}'.format(counter, image_url))
                 except self.DriverError:
+                    time.sleep(self.policy.delay(attempt))
+                    self.limiter.acquire(self.chapter_url)
                     self.driver.refresh()
                     continue
                 else:
                     break
             else:
-                print('Page {} {}'.format(counter, error_text))
+                image_url = error_text
+                print('Page {} {}'.format(counter, image_url))
 
-            self.urls.append(url)
-            next_page = self.driver.find_element_by_id(next_page_selector)
-            time.sleep(random.uniform(2, 3.5))
-            next_page.click()
+            self.urls.append(image_url)
+            if counter + 1 == self.total_pages:
+                break
 
-        self.driver.close()
+            if not pylib.turn_page(self.driver, (By.ID, image_id), next_page_selector, self.limiter, self.policy,
+                                   self.timeout):
+                # Same page would be saved again, remaining pages are unknown
+                print('Page {} not reached, {}'.format(counter + 1, error_text))
+                self.urls.extend([error_text] * (self.total_pages - counter - 1))
+                break
 
-    def _comic_image_url(self, image_id):
-        source, tag = 'src', 'img'
+        self.close()
+
+    def _comic_image_url(self, image_id, index):
+        # Keyboard control needs a display, import only when save dialog is used
+        import pyautogui, pyperclip
+
+        tag = 'img'
 
         try:
-            element = self.driver.find_element_by_id(image_id)
-            webpage = element.get_attribute(source)
+            webpage = pylib.wait_image(self.driver, (By.ID, image_id), self.timeout)
             self.driver.execute_script("window.open('{page}');".format(page=webpage))
-            time.sleep(1.2)
+            pylib.wait_windows(self.driver, 2, self.timeout)
             self.driver.switch_to.window(self.driver.window_handles[1])
-            image_tag = self.driver.find_element_by_tag_name(tag)
-            image_url = image_tag.get_attribute(source)
+            image_url = pylib.wait_image(self.driver, (By.TAG_NAME, tag), self.timeout)
 
             # Save image action
-            filename = datetime.datetime.now().strftime('%Y%m%dT%H%M%SMS%f')
+            filename = url.page_filename(index, url.url_extension(image_url))
             file_path = '{}/{}'.format(self.dir_path, filename)
             pyperclip.copy(file_path)
+            # Native save dialog can not be observed by selenium, keep short pauses
             time.sleep(0.3)
             pyautogui.hotkey('ctrl', 's') # Show save image popup
             time.sleep(0.2)
@@ -105,18 +180,174 @@ class Driver():
             self.driver.switch_to.window(self.driver.window_handles[0])
 
         return image_url
-            
-            
+
+    def _capture_image(self, image_id, index):
+        """
+        Write image of current page to dir_path without save dialog
+        Bytes are read from network log of browser, image is fetched again in own tab if log has no body
+        """
+        try:
+            image_url = pylib.wait_image(self.driver, (By.ID, image_id), self.timeout)
+            body = None
+            if self.network_log is not None:
+                body = self.network_log.wait_body(image_url, self.timeout)
+            if body is None:
+                body = self._fetch_image(image_url)
+
+            filename = url.page_filename(index, url.url_extension(image_url))
+            file_path = os.path.join(self.dir_path, filename)
+            part_path = file_path + '.part'
+            with open(part_path, mode='wb') as file:
+                file.write(body)
+            # Replace instead of writing in place, page may be hardlinked to image store
+            os.replace(part_path, file_path)
+        except self.DriverError:
+            raise
+        except Exception as err:
+            raise self.DriverError(err)
+
+        if self.manifest is not None:
+            self.manifest.update(index, image_url, filename, manifestcl.COMPLETE, len(body),
+                                 hashlib.sha256(body).hexdigest())
+        return image_url
+
+    def _fetch_image(self, image_url):
+        """
+        Return bytes of image_url fetched in new tab of image url
+        Tab origin is image host, so response is readable by page script
+
+        Error:
+            DriverError - Fetch failed in browser
+        """
+        self.limiter.acquire(image_url)
+        try:
+            self.driver.execute_script("window.open('{page}');".format(page=image_url))
+            pylib.wait_windows(self.driver, 2, self.timeout)
+            self.driver.switch_to.window(self.driver.window_handles[1])
+            self.driver.set_script_timeout(self.timeout)
+            result = self.driver.execute_async_script(_FETCH_IMAGE_SCRIPT, image_url)
+        finally:
+            for handle in self.driver.window_handles[1:]:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(self.driver.window_handles[0])
+
+        if not isinstance(result, str):
+            raise self.DriverError('Failed to fetch {}: {}'.format(image_url, result.get('error')))
+        return base64.b64decode(result)
+
+
+
+def image_chapters(config, sec_title, chapters, image_id, last_page_selector, next_page_selector,
+                   workers=1):
+    """
+    Save page images and write links csv file of chapters
+    With capture option devtools, chapters run at once in headless browsers
+    and images are written straight to book directory
+    With capture option keyboard, chapters run one by one in browser window
+
+    Parameters:
+        chapters - List of tuple (chapter title, chapter url, links csv path, book directory, manifest csv path)
+        image_id - Element id of page image
+        workers - Number of chapters captured at once, devtools capture only
+    Return:
+        List of exit code for each chapter, 0 on success
+    """
+    capture = config.capture(sec_title) == 'devtools'
+    # Keyboard goes to focused window only
+    workers = max(workers, 1) if capture else 1
+
+    limiter = pylib.rate_limiter(config, sec_title)
+    pool = pylib.browser_pool(config, sec_title, headless=capture, size=workers, network_log=capture)
+    error_text = config.error_url(sec_title)
+    timeout = config.page_timeout(sec_title)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_image_chapter, title, chapter_url, links_path, book_path, manifest_path, image_id,
+                            last_page_selector, next_page_selector, error_text, limiter, pool, timeout, capture)
+            for title, chapter_url, links_path, book_path, manifest_path in chapters
+        ]
+
+    return [future.result() for future in futures]
+
+
+def _image_chapter(title, chapter_url, links_path, book_path, manifest_path, image_id, last_page_selector,
+                   next_page_selector, error_text, limiter, pool, timeout, capture):
+    """
+    Save page images of single chapter of image_chapters
+
+    Return:
+        Exit code, 0 on success
+    """
+    # Captured pages are recorded like pages of download
+    manifest = None
+    if capture:
+        try:
+            manifest = pylib.load_manifest(manifest_path, book_path)
+        except pycomic_err.FileExistError:
+            logger.warning('Directory {} already exist'.format(book_path))
+            return 21
+
+    try:
+        driver = Driver(title, chapter_url, limiter=limiter, pool=pool, timeout=timeout, capture=capture)
+    except Exception as err:
+        logger.warning('Error: {}'.format(err))
+        logger.info('Failed to start browser for {}'.format(title))
+        return 3
+
+    try:
+        try:
+            driver.get()
+        except Exception:
+            logger.info('Driver failed to request {}'.format(chapter_url))
+            return 3
+
+        try:
+            driver.find_last_page(last_page_selector)
+        except Driver.DriverError as err:
+            logger.warning('Error: {}'.format(err))
+            logger.info('Failed to get last page value of {}'.format(title))
+            return 32
+
+        driver.get_urls_and_images(image_id, next_page_selector, error_text=error_text,
+                                   dir_path=book_path if capture else None, manifest=manifest)
+    finally:
+        driver.close()
+
+    code = pylib.write_links(links_path, driver.urls)
+    if capture:
+        logger.info('Save images to {} success'.format(book_path))
+        return code
+
+    # Copy temp images to book location
+    try:
+        shutil.copytree(driver.dir_path, book_path)
+    except shutil.Error as err:
+        # Directory are the same
+        logger.warning('Error: {}'.format(err))
+    except OSError as err:
+        logger.warning('Error: {}'.format(err))
+    else:
+        logger.info('Save images to {} success'.format(book_path))
+
+    return code
+
+
 
 class EynyDriver():
     
-    def __init__(self):
-        options = Options()
-        options.set_headless(False)
+    def __init__(self, timeout=10, limiter=None):
+        """
+        Input:
+            timeout - Seconds to wait for page to become ready
+            limiter - RateLimiter pacing image page requests
+        """
         self.driver = webdriver.Chrome()
+        self.timeout = timeout
+        self.limiter = limiter or ratecl.RateLimiter()
 
         self._LOGOUT_SELECTOR = '#toptb > div > div.y > a:nth-child(12)'
-        self.dir_path = '/tmp/pycomic'
 
     def get(self, url):
         self.driver.get(url)
@@ -140,21 +371,37 @@ class EynyDriver():
         password_input.send_keys(password)
         cookie_time.click()
         login_submit.click()
-        time.sleep(7)
+        self._wait_gone((By.NAME, 'loginsubmit'))
 
     def logout(self):
         """
         logout after download is finished
         """
+        self.site_tab()
         logout_link = self.driver.find_element_by_css_selector(self._LOGOUT_SELECTOR)
         logout_link.click()
-        time.sleep(4)
+        self._wait_gone((By.CSS_SELECTOR, self._LOGOUT_SELECTOR))
 
     def close(self):
         """
-        Close driver
+        Quit driver, chromedriver process is stopped too
         """
-        self.driver.close()
+        self.driver.quit()
+
+    def cookies(self):
+        """
+        Return cookies of login session, list of dict of selenium get_cookies
+        """
+        # Source code tab does not carry site cookies
+        self.site_tab()
+        return self.driver.get_cookies()
+
+    def user_agent(self):
+        """
+        Return User-Agent of browser, cookies of site may be bound to it
+        """
+        self.site_tab()
+        return self.driver.execute_script('return navigator.userAgent;')
 
     def adult_confirm(self):
         """
@@ -168,51 +415,27 @@ class EynyDriver():
         Open source code inspect tab
         """
         source_url = 'view-source:{}'.format(url)
+        windows = len(self.driver.window_handles)
         self.driver.execute_script("window.open();")
+        pylib.wait_windows(self.driver, windows + 1, self.timeout)
         self.driver.switch_to.window(self.driver.window_handles[-1])
-        time.sleep(0.5)
         self.driver.get(source_url)
 
-    def download_images(self, urls):
+    def site_tab(self):
         """
-        Simulate image download process using pyautogui
-        (Download like how a human do it)
-        Input:
-            urls - list of urls
+        Close source code tabs and switch back to site tab
         """
-        self.urls = urls
-
-        # Temporary save location
-        if os.path.isdir(self.dir_path):
-            shutil.rmtree(self.dir_path)
-        os.mkdir(self.dir_path)
-
-        # Save images
         for handle in self.driver.window_handles[1:]:
             self.driver.switch_to.window(handle)
             self.driver.close()
         self.driver.switch_to.window(self.driver.window_handles[0])
 
-        for index, url in enumerate(self.urls):
-            self.driver.execute_script("window.open('{page}');".format(page=url))
-            time.sleep(1.2)
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-
-            filename = datetime.datetime.now().strftime('%Y%m%dT%H%M%SMS%f')
-            file_path = '{}/{}'.format(self.dir_path, filename)
-            pyperclip.copy(file_path)
-            time.sleep(0.3)
-            pyautogui.hotkey('ctrl', 's') # Show save image popup
-            time.sleep(0.2)
-            pyautogui.hotkey('ctrl', 'v') # Paste image path
-            pyautogui.press('enter')
-
-            print('Page {} downloaded - {}'.format(index, url))
-
-            for handle in self.driver.window_handles[1:]:
-                self.driver.switch_to.window(handle)
-                self.driver.close()
-            self.driver.switch_to.window(self.driver.window_handles[0])
-
-
-    
\ No newline at end of file
+    def _wait_gone(self, locator):
+        """
+        Wait until element found by locator is removed or hidden
+        """
+        try:
+            WebDriverWait(self.driver, self.timeout).until(
+                expected_conditions.invisibility_of_element_located(locator))
+        except TimeoutException:
+            print('Element {} still shown after {} seconds'.format(locator[1], self.timeout))
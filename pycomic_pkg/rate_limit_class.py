@@ -0,0 +1,126 @@
+"""
+Program:
+    Token bucket rate limiter for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Buckets are kept per source section and per host,
+    shared by http downloader and selenium drivers
+"""
+
+import time, asyncio
+import threading
+
+from urllib.parse import urlparse
+
+
+class TokenBucket():
+
+    def __init__(self, rate=0, burst=1):
+        """
+        Input:
+            rate - Tokens added per second, 0 for unlimited
+            burst - Maximum tokens stored in bucket
+        """
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from bucket
+
+        Return:
+            Seconds to wait before reserved tokens can be used
+        """
+        if self.rate <= 0:
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+
+class RateLimiter():
+
+    def __init__(self, rate=0, burst=1, host_rate=0, host_burst=1):
+        """
+        Input:
+            rate - Requests per second of whole section, 0 for unlimited
+            burst - Requests allowed at once of whole section
+            host_rate - Requests per second of each host, 0 for unlimited
+            host_burst - Requests allowed at once of each host
+        """
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+
+        self._section_bucket = TokenBucket(rate, burst)
+        self._host_buckets = {}
+        self._host_pauses = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, url):
+        """
+        Reserve one request to url
+
+        Return:
+            Seconds to wait before request can be sent
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_buckets:
+                self._host_buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+            host_bucket = self._host_buckets[host]
+            paused = self._host_pauses.get(host, 0) - time.monotonic()
+
+        return max(self._section_bucket.reserve(), host_bucket.reserve(), paused)
+
+    def pause(self, url, seconds):
+        """
+        Hold requests to url's host for seconds, used when host asks for Retry-After
+        """
+        host = urlparse(url).netloc
+        until = time.monotonic() + seconds
+        with self._lock:
+            self._host_pauses[host] = max(self._host_pauses.get(host, 0), until)
+
+    def acquire(self, url):
+        """
+        Block until request to url is allowed
+        """
+        wait = self.reserve(url)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, url):
+        """
+        Asyncio counterpart of acquire
+        """
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(section, rate=0, burst=1, host_rate=0, host_burst=1):
+    """
+    Return shared RateLimiter object of section
+    Limiter is created with given settings on first call
+    """
+    with _limiters_lock:
+        if section not in _limiters:
+            _limiters[section] = RateLimiter(rate, burst, host_rate, host_burst)
+        return _limiters[section]
@@ -0,0 +1,82 @@
+"""
+Program:
+    Retry policy for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Exponential backoff with full jitter, Retry-After header is honored
+"""
+
+import random
+import datetime
+import email.utils
+
+
+# Status codes worth another attempt, other 5xx are retried as well
+RETRY_STATUSES = (408, 425, 429)
+
+
+class RetryPolicy():
+
+    def __init__(self, attempts=10, base=1, cap=60, retry_statuses=RETRY_STATUSES):
+        """
+        Input:
+            attempts - Maximum attempts of one request
+            base - Seconds of first backoff
+            cap - Maximum seconds of backoff
+            retry_statuses - Status codes to retry besides 5xx
+        """
+        self.attempts = max(int(attempts), 1)
+        self.base = float(base)
+        self.cap = float(cap)
+        self.retry_statuses = retry_statuses
+
+    def is_retryable(self, status):
+        """
+        status None means connection error or timeout, always retryable
+        4xx other than retry_statuses are permanent (403, 404, 410 ...)
+        """
+        if status is None:
+            return True
+        return status in self.retry_statuses or 500 <= status < 600
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before next attempt
+
+        Parameters:
+            attempt - Number of failed attempts, start from 0
+            retry_after - Seconds requested by server Retry-After header
+        """
+        backoff = random.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+        if retry_after is not None:
+            return max(backoff, retry_after)
+        return backoff
+
+
+def parse_retry_after(value):
+    """
+    Parse Retry-After header value, seconds or HTTP date
+
+    Return:
+        Seconds to wait, None if value not usable
+    """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max((retry_date - now).total_seconds(), 0)
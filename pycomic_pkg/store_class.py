@@ -0,0 +1,115 @@
+"""
+Program:
+    Content-addressed image store for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Blob path: STORE/ab/cd/abcd...(sha256 hex digest)
+    Pages are hardlinks of blobs, identical pages share one copy on disk
+"""
+
+import os, errno
+import hashlib
+
+
+# Read size of hashing image file
+CHUNK_SIZE = 256 * 1024
+
+
+class BlobStore():
+
+    def __init__(self, root):
+        """
+        Input:
+            root - Store directory, should be on the same filesystem as books
+        """
+        self.root = root
+
+    def path(self, digest):
+        """
+        Return blob path of sha256 hex digest
+        """
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def add(self, file_path, digest=None):
+        """
+        Store file_path as blob and replace it with hardlink of the blob
+        File already stored as identical blob is replaced by the blob
+
+        Parameter:
+            digest - sha256 hex digest of file_path, computed if not given
+        Return:
+            Bytes saved by linking file_path to existing blob
+        Error:
+            FileNotFoundError - file_path not found
+        """
+        digest = digest or file_digest(file_path)
+        blob_path = self.path(digest)
+
+        if not os.path.isfile(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            try:
+                os.link(file_path, blob_path)
+            except FileExistsError:
+                # Same blob stored by another worker
+                pass
+            except OSError as err:
+                if err.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    return 0
+                raise
+            else:
+                return 0
+
+        if os.path.samefile(file_path, blob_path):
+            return 0
+
+        size = os.path.getsize(file_path)
+        if size != os.path.getsize(blob_path):
+            # Recorded digest does not match file content
+            return 0
+
+        link_path = file_path + '.link'
+        try:
+            os.link(blob_path, link_path)
+        except OSError as err:
+            if err.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                return 0
+            raise
+        os.replace(link_path, file_path)
+
+        return size
+
+    def add_directory(self, directory, digests=None):
+        """
+        Store every image file under directory
+
+        Parameter:
+            digests - dict of filename to known sha256 hex digest
+        Return:
+            Tuple: (number of files, bytes saved)
+        """
+        digests = digests or {}
+        total, saved = 0, 0
+
+        for dirpath, _dirs, files in os.walk(directory):
+            for filename in sorted(files):
+                if filename.endswith(('.part', '.rename', '.link')):
+                    continue
+                total += 1
+                saved += self.add(os.path.join(dirpath, filename), digests.get(filename))
+
+        return total, saved
+
+
+def file_digest(file_path):
+    """
+    Return sha256 hex digest of file_path
+    """
+    hasher = hashlib.sha256()
+    with open(file_path, mode='rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
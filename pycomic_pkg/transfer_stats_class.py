@@ -0,0 +1,179 @@
+"""
+Program:
+    Per host transfer statistics for pycomic program
+Author:
+    haw
+Version:
+    1.0.0
+Note:
+    Each request records status, time to first byte, total time and bytes received,
+    summary gives counts and p50 / p95 / p99 latency of every host
+"""
+
+import os, json
+import math
+import time, datetime
+import threading
+
+from urllib.parse import urlparse
+
+
+PERCENTILES = (50, 95, 99)
+
+
+class TransferStats():
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def request(self, url):
+        """
+        Return Transfer recording one request to url, used as context manager
+        """
+        return Transfer(self, url)
+
+    def retry(self, url):
+        """
+        Count retry of request to url's host
+        """
+        with self._lock:
+            self._host(urlparse(url).netloc)['retries'] += 1
+
+    def record(self, url, status, ttfb, total, size):
+        """
+        Record finished request
+
+        Parameter:
+            status - Response status code, 'error' if no response
+            ttfb - Seconds to first byte, None if no response
+            total - Seconds of whole request
+            size - Bytes of response body received
+        """
+        with self._lock:
+            host = self._host(urlparse(url).netloc)
+            host['requests'] += 1
+            host['bytes'] += size
+            host['statuses'][str(status)] = host['statuses'].get(str(status), 0) + 1
+            host['total'].append(total)
+            if ttfb is not None:
+                host['ttfb'].append(ttfb)
+
+    def summary(self):
+        """
+        Return dict of host name to summary of requests
+        """
+        summary = {}
+        with self._lock:
+            for name, host in sorted(self._hosts.items()):
+                elapsed = sum(host['total'])
+                summary[name] = {
+                    'requests': host['requests'],
+                    'retries': host['retries'],
+                    'bytes': host['bytes'],
+                    'statuses': dict(host['statuses']),
+                    'throughput': host['bytes'] / elapsed if elapsed > 0 else 0,
+                    'ttfb': percentiles(host['ttfb']),
+                    'total': percentiles(host['total']),
+                }
+        return summary
+
+    def print_summary(self):
+        """
+        Print summary table of every host
+        """
+        summary = self.summary()
+        if not summary:
+            return
+
+        print('{:<24} {:>6} {:>6} {:>10} {:>9}  {:<20} {:<20} {}'.format(
+              'HOST', 'REQ', 'RETRY', 'KB', 'KB/S', 'TTFB MS P50/95/99', 'TOTAL MS P50/95/99', 'STATUS'))
+        for name, host in summary.items():
+            print('{:<24} {:>6} {:>6} {:>10.0f} {:>9.1f}  {:<20} {:<20} {}'.format(
+                  name, host['requests'], host['retries'], host['bytes'] / 1024, host['throughput'] / 1024,
+                  _format_percentiles(host['ttfb']), _format_percentiles(host['total']),
+                  ' '.join('{}:{}'.format(status, count) for status, count in sorted(host['statuses'].items()))))
+
+    def dump(self, path, **fields):
+        """
+        Append summary to path as one json line
+
+        Parameter:
+            fields - Extra fields of json object, e.g. section
+        """
+        record = {'time': datetime.datetime.now().isoformat(timespec='seconds')}
+        record.update(fields)
+        record['hosts'] = self.summary()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, mode='at', encoding='utf-8') as file:
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def _host(self, name):
+        """
+        Statistics of host, created on first use
+        Caller holds lock
+        """
+        if name not in self._hosts:
+            self._hosts[name] = {'requests': 0, 'retries': 0, 'bytes': 0, 'statuses': {},
+                                 'ttfb': [], 'total': []}
+        return self._hosts[name]
+
+
+
+class Transfer():
+
+    def __init__(self, stats, url):
+        """
+        Input:
+            stats - TransferStats receiving the record
+            url - Requested url
+        """
+        self.stats = stats
+        self.url = url
+        self.status = None
+        self.ttfb = None
+        self.size = 0
+        self._started = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # Status of failed request comes from exception if it has one
+        status = getattr(exc, 'status', None) or self.status or 'error'
+        self.stats.record(self.url, status, self.ttfb, time.monotonic() - self._started, self.size)
+        return False
+
+    def response(self, status):
+        """
+        Mark response headers received
+        """
+        self.status = status
+        self.ttfb = time.monotonic() - self._started
+
+    def received(self, size):
+        """
+        Count bytes of response body
+        """
+        self.size += size
+
+
+
+def percentiles(samples):
+    """
+    Return dict of nearest rank percentiles of samples, empty if no sample
+    """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {'p{}'.format(p): ordered[max(math.ceil(p / 100 * len(ordered)), 1) - 1] for p in PERCENTILES}
+
+
+def _format_percentiles(values):
+    """
+    Format percentiles in milliseconds as p50/p95/p99
+    """
+    if not values:
+        return '-'
+    return '/'.join('{:.0f}'.format(values['p{}'.format(p)] * 1000) for p in PERCENTILES)
@@ -4,17 +4,61 @@ Program:
 Author:
     haw
 Version:
-    0.2
+    0.3
 Note:
     Version 0.2 change _image_request parameter: header
     Not compatible with previous Version 0.1.X
+    Version 0.3 download_images run with concurrent workers
+    Version 0.3 asyncio backend: download_images_async, download_image_async
+    Version 0.3 images are streamed to file in CHUNK_SIZE blocks
+    Version 0.3 request pacing by rate_limit_class instead of fixed sleeps
+    Version 0.3 transfers are written to .part file and resumed with Range request
+    Version 0.3 download_images record pages to chapter manifest and skip completed pages
+    Version 0.3 retry_class policy backs off between attempts, permanent errors are not retried
+    Version 0.3 page files are named by page index instead of timestamp
+    Version 0.3 known placeholder urls and images are not written, recorded to manifest
+    Version 0.3 download_chapters share one worker pool across chapters
+    Version 0.3 image body read is capped by bandwidth_class limiter
+    Version 0.3 page urls are rewritten to best mirror_class host, failing hosts are avoided
+    Version 0.3 every image request is recorded to transfer_stats_class per host
 """
 
 import os, re
 import html, collections, hashlib
-import time, datetime, random
+import time
+import threading, asyncio
+import concurrent.futures
+
+from urllib.parse import urlparse
 
 import requests
+import aiohttp
+
+from pycomic_pkg import http_class as httpcl
+from pycomic_pkg import rate_limit_class as ratecl
+from pycomic_pkg import manifest_class as manifestcl
+from pycomic_pkg import retry_class as retrycl
+from pycomic_pkg import placeholder_class as placeholdercl
+from pycomic_pkg import bandwidth_class as bandwidthcl
+from pycomic_pkg import mirror_class as mirrorcl
+from pycomic_pkg import transfer_stats_class as statscl
+
+
+# Read size of streaming image download
+CHUNK_SIZE = 256 * 1024
+# Suffix of unfinished image download
+PART_SUFFIX = '.part'
+# Digits of zero-padded page filename
+PAGE_DIGITS = 4
+# Extensions kept in page filename
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp')
+
+# One chapter of download_chapters
+#   urls - Page urls in order
+#   directory - Book directory of chapter
+#   page_headers - List of header for each url, None to use shared header
+#   manifest - Chapter Manifest, None to keep in memory
+Chapter = collections.namedtuple('Chapter', 'urls directory page_headers manifest')
 
 
 def extract_images(input_file, duplicates=False, extension=True):
@@ -72,109 +116,700 @@ def extract_images(input_file, duplicates=False, extension=True):
 
 
 
-def download_image(url, target_path, header=None):
+def download_image(url, target_path, header=None, limiter=None, policy=None):
     """
     Download image from urls to destination
 
     Parameters:
         file_path - File storing destination
+        limiter - RateLimiter pacing each request attempt
+        policy - RetryPolicy deciding backoff between attempts
     Error:
         FileNotFoundError - File path not found
         urlError - Raised if image request failed
     """
+    limiter = limiter or ratecl.RateLimiter()
+    policy = policy or retrycl.RetryPolicy(attempts=5)
+
     # Request for image file
     print('Header: {}'.format(header))
-    for _ in range(5):
+    for attempt in range(policy.attempts):
+        limiter.acquire(url)
         try:
             print('Request URL: {}'.format(url))
-            img_request = _image_request(url, header)
+            _image_download(url, target_path, header)
             break
-        except RuntimeError:
-            time.sleep(1)
-    else:
-        raise ReferenceError('Request for image {} failed'.format(url))
+        except RequestError as err:
+            if not policy.is_retryable(err.status) or attempt + 1 == policy.attempts:
+                raise ReferenceError('Request for image {} failed'.format(url))
+            time.sleep(_retry_delay(policy, limiter, url, attempt, err))
 
-    # Write image to file_path
-    _image_write(img_request, target_path)
     print('Download {} success'.format(target_path))
 
 
 
-def download_images(urls, target_directory, header=None):
+def download_images(urls, target_directory, header=None, page_headers=None, workers=1,
+                    host_connections=2, limiter=None, manifest=None, policy=None, placeholders=None,
+                    bandwidth=None, mirrors=None, stats=None):
     """
     Download images and save into directory
 
     Parameters:
         urls - iterable
+        page_headers - List of header for each url, override header
+        workers - Number of concurrent download workers
+        host_connections - Maximum concurrent requests to the same host
+        limiter - RateLimiter pacing each request attempt
+        manifest - Chapter Manifest, completed pages are skipped
+        policy - RetryPolicy deciding backoff between attempts
+        placeholders - PlaceholderRegistry, placeholder pages are not written
+        bandwidth - BandwidthLimiter capping bytes per second of image transfer
+        mirrors - MirrorSet, page urls are rewritten to best mirror host
+        stats - TransferStats recording every request
     Error:
         FileNotFoundError - File path not found
     Reutrn:
         List of error messages that occur during image download
     """
-    errors = []
-
-    for index, url in enumerate(urls):
-        for _ in range(10):
-            try:
-                img_request = _image_request(url, header)
-            except RuntimeError:
-                time.sleep(1)
-            else:
-                filename = datetime.datetime.now().strftime('%Y%m%dT%H%M%SMS%f')
-                _image_write(img_request, os.path.join(target_directory, filename))
-                print('Download index {:>3} - URL {} success'.format(index, url))
-                break
+    chapter = Chapter(urls, target_directory, page_headers, manifest)
+    return download_chapters([chapter], header=header, workers=workers,
+                             host_connections=host_connections, limiter=limiter,
+                             policy=policy, placeholders=placeholders, bandwidth=bandwidth,
+                             mirrors=mirrors, stats=stats)[0]
+
+
+
+def download_chapters(chapters, header=None, workers=1, host_connections=2, limiter=None,
+                      policy=None, placeholders=None, bandwidth=None, mirrors=None, stats=None):
+    """
+    Download pages of every chapter with one shared worker pool
+
+    Parameters:
+        chapters - List of Chapter
+        workers - Number of concurrent download workers
+        host_connections - Maximum concurrent requests to the same host
+        limiter - RateLimiter pacing each request attempt
+        policy - RetryPolicy deciding backoff between attempts
+        placeholders - PlaceholderRegistry, placeholder pages are not written
+        bandwidth - BandwidthLimiter capping bytes per second of image transfer
+        mirrors - MirrorSet, page urls are rewritten to best mirror host
+        stats - TransferStats recording every request
+    Error:
+        FileNotFoundError - File path not found
+    Return:
+        List of error message lists, one list for each chapter
+    """
+    limiter = limiter or ratecl.RateLimiter()
+    policy = policy or retrycl.RetryPolicy()
+    placeholders = placeholders or placeholdercl.PlaceholderRegistry()
+    bandwidth = bandwidth or bandwidthcl.BandwidthLimiter()
+    mirrors = mirrors if mirrors is not None else mirrorcl.MirrorSet()
+    stats = stats or statscl.TransferStats()
+    chapters = [_chapter_defaults(chapter) for chapter in chapters]
+    # Host slots belong to this run, host_connections of earlier runs does not stick
+    host_slots = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = [
+            [
+                executor.submit(_download_page, index, url, os.path.join(chapter.directory, filename),
+                                chapter.page_headers[index] if chapter.page_headers else header,
+                                host_slots, host_connections, limiter, chapter.manifest, policy,
+                                placeholders, bandwidth, mirrors, stats)
+                for index, url, filename in _plan_pages(chapter.urls, chapter.directory, chapter.manifest)
+            ]
+            for chapter in chapters
+        ]
+
+    return [[error for error in (future.result() for future in chapter_futures) if error]
+            for chapter_futures in futures]
+
+
+
+def _download_page(index, url, file_path, header, host_slots, host_connections, limiter, manifest,
+                   policy, placeholders, bandwidth, mirrors, stats):
+    """
+    Download single page of download_images
+
+    Return:
+        Error message if request failed, None on success
+    Error:
+        FileNotFoundError - File path not found
+    """
+    filename = os.path.basename(file_path)
+    if placeholders.is_placeholder_url(url):
+        return _page_placeholder(index, url, filename, manifest)
+
+    for attempt in range(policy.attempts):
+        # Mirror is chosen again on each attempt, failing host is left after cooldown
+        request_url = mirrors.rewrite(url)
+        limiter.acquire(request_url)
+        started = time.monotonic()
+        try:
+            with _host_slot(host_slots, request_url, host_connections):
+                size, digest = _image_download(request_url, file_path, header, placeholders, bandwidth,
+                                               stats)
+        except PlaceholderError:
+            return _page_placeholder(index, url, filename, manifest)
+        except RequestError as err:
+            mirrors.record(request_url)
+            if not policy.is_retryable(err.status):
+                return _page_failed(index, url, filename, manifest, err)
+            if attempt + 1 < policy.attempts:
+                stats.retry(request_url)
+                time.sleep(_retry_delay(policy, limiter, request_url, attempt, err))
         else:
-            print('Download index {:>3} - URL {} exceed attempt limit'.format(index, url))
-            errors.append('Index {:>3} exceed request attempt limit: {}'.format(index, url))
-        time.sleep(random.uniform(1, 2.5))
+            mirrors.record(request_url, time.monotonic() - started)
+            manifest.update(index, url, filename, manifestcl.COMPLETE, size, digest)
+            print('Download index {:>3} - URL {} success'.format(index, request_url))
+            return None
+    return _page_failed(index, url, filename, manifest)
+
+
+
+def _page_failed(index, url, filename, manifest, err=None):
+    """
+    Record failed page to manifest
+
+    Parameter:
+        err - RequestError of permanent failure, None if attempt limit exceeded
+    Return:
+        Error message of page
+    """
+    manifest.update(index, url, filename, manifestcl.FAILED)
+    if err is None:
+        print('Download index {:>3} - URL {} exceed attempt limit'.format(index, url))
+        return 'Index {:>3} exceed request attempt limit: {}'.format(index, url)
+
+    print('Download index {:>3} - URL {} failed with status {}'.format(index, url, err.status))
+    return 'Index {:>3} failed with status {}: {}'.format(index, err.status, url)
+
+
+
+def _page_placeholder(index, url, filename, manifest):
+    """
+    Record placeholder page to manifest
+
+    Return:
+        Error message of page
+    """
+    manifest.update(index, url, filename, manifestcl.PLACEHOLDER)
+    print('Download index {:>3} - URL {} is placeholder image'.format(index, url))
+    return 'Index {:>3} placeholder image: {}'.format(index, url)
+
+
+
+def _retry_delay(policy, limiter, url, attempt, err):
+    """
+    Seconds to wait before next attempt to url
+    Host asking for Retry-After is paused for every worker of limiter
+    """
+    if err.retry_after is not None:
+        limiter.pause(url, err.retry_after)
+    return policy.delay(attempt, err.retry_after)
+
+
+
+def _chapter_defaults(chapter):
+    """
+    Chapter with urls as list and in-memory manifest if not given
+    """
+    manifest = chapter.manifest if chapter.manifest is not None else manifestcl.Manifest()
+    return chapter._replace(urls=list(chapter.urls), manifest=manifest)
+
+
+
+def _plan_pages(urls, target_directory, manifest):
+    """
+    Pages of urls which still need download
+    Filenames recorded in manifest are reused to keep pages in order
+
+    Return:
+        List of (index, url, filename)
+    """
+    urls = list(urls)
+    filenames = [manifest.filename(index) or page_filename(index, url_extension(url))
+                 for index, url in enumerate(urls)]
+    manifest.register((index, url, filenames[index]) for index, url in enumerate(urls))
+
+    return [(index, url, filenames[index]) for index, url in enumerate(urls)
+            if not manifest.is_complete(index, target_directory)]
+
+
+
+def page_filename(index, extension=''):
+    """
+    Zero-padded filename of page index, sorted in page order
+
+    Parameter:
+        extension - Filename extension with leading dot
+    """
+    return '{:0{}d}{}'.format(index, PAGE_DIGITS, extension)
+
+
+
+def url_extension(url):
+    """
+    Image extension of url path, lower case with leading dot
+
+    Return:
+        Extension, empty string if url has no image extension
+    """
+    extension = os.path.splitext(urlparse(url).path)[1].lower()
+    return extension if extension in IMAGE_EXTENSIONS else ''
+
+
+
+_host_lock = threading.Lock()
+
+def _host_slot(host_slots, url, limit, semaphore_class=threading.BoundedSemaphore):
+    """
+    Semaphore limiting concurrent requests to url's host
+
+    Parameters:
+        host_slots - Host to semaphore dict of one download run
+        url - Url actually requested, after mirror rewrite
+        limit - Maximum concurrent requests to the host
+        semaphore_class - threading.BoundedSemaphore or asyncio.Semaphore
+    """
+    host = urlparse(url).netloc
+    with _host_lock:
+        if host not in host_slots:
+            host_slots[host] = semaphore_class(max(limit, 1))
+        return host_slots[host]
+
+
+
+async def download_image_async(session, url, target_path, header=None, limiter=None, policy=None):
+    """
+    Asyncio counterpart of download_image
+
+    Parameters:
+        session - aiohttp.ClientSession
+        limiter - RateLimiter pacing each request attempt
+        policy - RetryPolicy deciding backoff between attempts
+    Error:
+        FileNotFoundError - File path not found
+        ReferenceError - Raised if image request failed
+    """
+    limiter = limiter or ratecl.RateLimiter()
+    policy = policy or retrycl.RetryPolicy(attempts=5)
+
+    for attempt in range(policy.attempts):
+        await limiter.acquire_async(url)
+        try:
+            await _image_fetch_async(session, url, target_path, header)
+            break
+        except RequestError as err:
+            if not policy.is_retryable(err.status) or attempt + 1 == policy.attempts:
+                raise ReferenceError('Request for image {} failed'.format(url))
+            await asyncio.sleep(_retry_delay(policy, limiter, url, attempt, err))
+
+    print('Download {} success'.format(target_path))
+
+
+
+async def download_images_async(urls, target_directory, header=None, page_headers=None,
+                                in_flight=100, host_connections=2, limiter=None, manifest=None,
+                                policy=None, placeholders=None, bandwidth=None, mirrors=None, stats=None):
+    """
+    Asyncio counterpart of download_images
+    Keep up to in_flight requests running on one thread
+
+    Parameters:
+        urls - iterable
+        page_headers - List of header for each url, override header
+        in_flight - Maximum requests in flight
+        host_connections - Maximum concurrent requests to the same host
+        limiter - RateLimiter pacing each request attempt
+        manifest - Chapter Manifest, completed pages are skipped
+        policy - RetryPolicy deciding backoff between attempts
+        placeholders - PlaceholderRegistry, placeholder pages are not written
+        bandwidth - BandwidthLimiter capping bytes per second of image transfer
+        mirrors - MirrorSet, page urls are rewritten to best mirror host
+        stats - TransferStats recording every request
+    Error:
+        FileNotFoundError - File path not found
+    Return:
+        List of error messages that occur during image download
+    """
+    chapter = Chapter(urls, target_directory, page_headers, manifest)
+    errors = await download_chapters_async([chapter], header=header, in_flight=in_flight,
+                                           host_connections=host_connections, limiter=limiter,
+                                           policy=policy, placeholders=placeholders,
+                                           bandwidth=bandwidth, mirrors=mirrors, stats=stats)
+    return errors[0]
+
+
+
+async def download_chapters_async(chapters, header=None, in_flight=100, host_connections=2,
+                                  limiter=None, policy=None, placeholders=None, bandwidth=None,
+                                  mirrors=None, stats=None):
+    """
+    Asyncio counterpart of download_chapters
+
+    Return:
+        List of error message lists, one list for each chapter
+    """
+    limiter = limiter or ratecl.RateLimiter()
+    policy = policy or retrycl.RetryPolicy()
+    placeholders = placeholders or placeholdercl.PlaceholderRegistry()
+    bandwidth = bandwidth or bandwidthcl.BandwidthLimiter()
+    mirrors = mirrors if mirrors is not None else mirrorcl.MirrorSet()
+    stats = stats or statscl.TransferStats()
+    chapters = [_chapter_defaults(chapter) for chapter in chapters]
+
+    semaphore = asyncio.Semaphore(max(in_flight, 1))
+    host_semaphores = {}
+
+    async with httpcl.client().async_session(in_flight, host_connections) as session:
+        tasks, owners = [], []
+        for chapter_index, chapter in enumerate(chapters):
+            for index, url, filename in _plan_pages(chapter.urls, chapter.directory, chapter.manifest):
+                page_header = chapter.page_headers[index] if chapter.page_headers else header
+                tasks.append(_download_page_async(session, semaphore, host_semaphores, host_connections,
+                                                  index, url, os.path.join(chapter.directory, filename),
+                                                  page_header, limiter, chapter.manifest, policy,
+                                                  placeholders, bandwidth, mirrors, stats))
+                owners.append(chapter_index)
+        results = await asyncio.gather(*tasks)
+
+    errors = [[] for _ in chapters]
+    for chapter_index, error in zip(owners, results):
+        if error:
+            errors[chapter_index].append(error)
 
     return errors
 
 
 
-def _image_request(url, header=None):
+def run_download_images_async(urls, target_directory, header=None, page_headers=None,
+                              in_flight=100, host_connections=2, limiter=None, manifest=None,
+                              policy=None, placeholders=None, bandwidth=None, mirrors=None, stats=None):
+    """
+    Synchronous wrapper of download_images_async
+
+    Return:
+        List of error messages that occur during image download
+    """
+    return asyncio.run(download_images_async(urls, target_directory, header=header,
+                                             page_headers=page_headers, in_flight=in_flight,
+                                             host_connections=host_connections, limiter=limiter,
+                                             manifest=manifest, policy=policy,
+                                             placeholders=placeholders, bandwidth=bandwidth,
+                                             mirrors=mirrors, stats=stats))
+
+
+
+def run_download_chapters_async(chapters, header=None, in_flight=100, host_connections=2,
+                                limiter=None, policy=None, placeholders=None, bandwidth=None,
+                                mirrors=None, stats=None):
+    """
+    Synchronous wrapper of download_chapters_async
+
+    Return:
+        List of error message lists, one list for each chapter
+    """
+    return asyncio.run(download_chapters_async(chapters, header=header, in_flight=in_flight,
+                                               host_connections=host_connections, limiter=limiter,
+                                               policy=policy, placeholders=placeholders,
+                                               bandwidth=bandwidth, mirrors=mirrors, stats=stats))
+
+
+
+async def _download_page_async(session, semaphore, host_semaphores, host_connections, index, url,
+                               file_path, header, limiter, manifest, policy, placeholders, bandwidth,
+                               mirrors, stats):
+    """
+    Download single page of download_images_async
+
+    Return:
+        Error message if request failed, None on success
+    """
+    filename = os.path.basename(file_path)
+    if placeholders.is_placeholder_url(url):
+        return _page_placeholder(index, url, filename, manifest)
+
+    for attempt in range(policy.attempts):
+        request_url = mirrors.rewrite(url)
+        await limiter.acquire_async(request_url)
+        started = time.monotonic()
+        try:
+            # Slots are held for the request only, page waiting for retry gives them to other pages
+            # Host slot is taken for the mirror host actually contacted, as in _download_page
+            host_semaphore = _host_slot(host_semaphores, request_url, host_connections, asyncio.Semaphore)
+            async with semaphore, host_semaphore:
+                size, digest = await _image_fetch_async(session, request_url, file_path, header,
+                                                        placeholders, bandwidth, stats)
+        except PlaceholderError:
+            return _page_placeholder(index, url, filename, manifest)
+        except RequestError as err:
+            mirrors.record(request_url)
+            if not policy.is_retryable(err.status):
+                return _page_failed(index, url, filename, manifest, err)
+            if attempt + 1 < policy.attempts:
+                stats.retry(request_url)
+                await asyncio.sleep(_retry_delay(policy, limiter, request_url, attempt, err))
+        else:
+            mirrors.record(request_url, time.monotonic() - started)
+            manifest.update(index, url, filename, manifestcl.COMPLETE, size, digest)
+            print('Download index {:>3} - URL {} success'.format(index, request_url))
+            return None
+    return _page_failed(index, url, filename, manifest)
+
+
+
+async def _image_fetch_async(session, url, file_path, header=None, placeholders=None, bandwidth=None,
+                             stats=None):
+    """
+    Request for image from url with aiohttp session
+    and stream response body to file_path
+    Resume from existing .part file with Range request
+    File work (resume hash, writes, rename) runs in executor thread so other pages keep transferring
+
+    Return:
+        Tuple: (size, sha256 hex digest) of saved image
+    Error:
+        FileNotFoundError - File path not found
+        RequestError - Raised if failed to request for image
+        PlaceholderError - Raised if image is a known placeholder
+    """
+    part_path = file_path + PART_SUFFIX
+    offset = _part_offset(part_path)
+    stats = stats or statscl.TransferStats()
+    loop = asyncio.get_running_loop()
+
+    try:
+        with stats.request(url) as transfer:
+            async with session.get(url, headers=_range_header(header, offset)) as response:
+                transfer.response(response.status)
+                mode = _part_mode(part_path, offset, response.status, response.headers)
+                hasher = await loop.run_in_executor(None, _part_hasher, part_path, mode)
+
+                file = await loop.run_in_executor(None, open, part_path, mode)
+                try:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        await loop.run_in_executor(None, _write_chunk, file, hasher, chunk)
+                        transfer.received(len(chunk))
+                        if bandwidth:
+                            await bandwidth.throttle_async(len(chunk))
+                finally:
+                    await loop.run_in_executor(None, file.close)
+
+                digest = hasher.hexdigest()
+                size = await loop.run_in_executor(None, _part_finish, part_path, file_path, mode, offset,
+                                                  response.content_length, digest, placeholders)
+                return size, digest
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        print('Request error: {}'.format(err))
+        raise RequestError('Request for image failed')
+    except FileNotFoundError as err:
+        print('Write file error {}: {}'.format(err.errno, err.strerror))
+        raise
+
+
+
+def _image_download(url, file_path, header=None, placeholders=None, bandwidth=None, stats=None):
+    """
+    Request for image from url and save to file_path
+    Resume from existing .part file with Range request
+
+    Return:
+        Tuple: (size, sha256 hex digest) of saved image
+    Error:
+        FileNotFoundError - File path not found
+        RequestError - Raised if failed to request for image
+        PlaceholderError - Raised if image is a known placeholder
+    """
+    offset = _part_offset(file_path + PART_SUFFIX)
+    stats = stats or statscl.TransferStats()
+
+    with stats.request(url) as transfer:
+        image = _image_request(url, header, offset)
+        transfer.response(image.status_code)
+        return _image_write(image, file_path, offset, placeholders, bandwidth, transfer)
+
+
+
+def _image_request(url, header=None, offset=0):
     """
     Request for image from url
+    Response body is not read until _image_write
 
+    Parameter:
+        offset - Request bytes starting from offset
     Return:
-        Requested object
+        Requested object (streaming)
     Error:
-        RuntimeError - Raised if failed to request for image
+        RequestError - Raised if failed to request for image
     """
-    # Request for image
-    if header:
-        print('Run with header {}'.format(header))
-        image_request = requests.get(url, headers=header)
-    else:
-        print('Run without header')
-        image_request = requests.get(url)
+    try:
+        image_request = httpcl.client().get(url, headers=_range_header(header, offset), stream=True)
+    except requests.exceptions.RequestException as err:
+        print('Request error: {}'.format(err))
+        raise RequestError('Request for image failed')
 
-    # Check status code
-    if image_request.status_code == 200:
+    # Check status code, 416 is left to _part_mode to drop part file not matching server
+    if image_request.status_code in (200, 206, 416):
         return image_request
     else:
         print('Respond Code: {}'.format(image_request.status_code))
-        raise RuntimeError('Request for image failed')
+        image_request.close()
+        raise RequestError('Request for image failed', image_request.status_code,
+                           retrycl.parse_retry_after(image_request.headers.get('Retry-After')))
 
 
 
-def _image_write(image, file_path):
+def _image_write(image, file_path, offset=0, placeholders=None, bandwidth=None, transfer=None):
     """
-    Save image to destination
+    Stream image to .part file in CHUNK_SIZE blocks
+    and rename to destination when transfer complete
 
     Parameter:
-        image - Request object
+        image - Request object (streaming)
+        offset - Bytes already in .part file
+        placeholders - PlaceholderRegistry, placeholder image is discarded
+        bandwidth - BandwidthLimiter, read is paused to stay within budget
+        transfer - Transfer of transfer_stats_class counting bytes received
+    Return:
+        Tuple: (size, sha256 hex digest) of saved image
     Error:
         FileNotFoundError - File path not found
+        RequestError - Raised if connection broken during transfer
+        PlaceholderError - Raised if image is a known placeholder
     """
+    part_path = file_path + PART_SUFFIX
+
     try:
-        with open(file_path, mode='wb') as file:
-            for chunk in image:
+        mode = _part_mode(part_path, offset, image.status_code, image.headers)
+        hasher = _part_hasher(part_path, mode)
+
+        with open(part_path, mode=mode) as file:
+            for chunk in image.iter_content(chunk_size=CHUNK_SIZE):
+                hasher.update(chunk)
                 file.write(chunk)
+                if transfer:
+                    transfer.received(len(chunk))
+                if bandwidth:
+                    bandwidth.throttle(len(chunk))
+
+        content_length = image.headers.get('Content-Length')
+        digest = hasher.hexdigest()
+        size = _part_finish(part_path, file_path, mode, offset, int(content_length) if content_length else None,
+                            digest, placeholders)
+        return size, digest
     except FileNotFoundError as err:
         print('Write file error {}: {}'.format(err.errno, err.strerror))
         raise
+    except requests.exceptions.RequestException as err:
+        print('Transfer error: {}'.format(err))
+        raise RequestError('Transfer of image failed')
+    finally:
+        image.close()
+
+
+
+def _part_offset(part_path):
+    """
+    Return size of existing .part file, 0 if not exist
+    """
+    try:
+        return os.path.getsize(part_path)
+    except OSError:
+        return 0
+
+
+
+def _range_header(header, offset):
+    """
+    Request header resuming transfer from offset
+    Identity encoding keep byte offsets matching the file
+    """
+    range_header = dict(header) if header else {}
+    range_header['Accept-Encoding'] = 'identity'
+    if offset > 0:
+        range_header['Range'] = 'bytes={}-'.format(offset)
+
+    return range_header
+
+
+
+def _part_mode(part_path, offset, status, headers):
+    """
+    File mode to write response body into .part file
+
+    Parameter:
+        headers - Response headers
+    Return:
+        'ab' if server resumes from offset, 'wb' if server sends whole image
+    Error:
+        RequestError - Raised if response status is not usable
+    """
+    if status == 200:
+        return 'wb'
+
+    if status == 206 and offset > 0:
+        match = re.match(r'bytes (\d+)-', headers.get('Content-Range') or '')
+        if match and int(match.group(1)) == offset:
+            return 'ab'
+
+    print('Respond Code: {}'.format(status))
+    if status in (206, 416):
+        # Part file does not match server content, restart from zero
+        if os.path.isfile(part_path):
+            os.remove(part_path)
+        raise RequestError('Range of image not satisfied')
+    raise RequestError('Request for image failed', status,
+                       retrycl.parse_retry_after(headers.get('Retry-After')))
+
+
+
+def _part_finish(part_path, file_path, mode, offset, content_length, digest=None, placeholders=None):
+    """
+    Rename .part file to file_path if transfer is complete
+    Known placeholder image is removed instead
+
+    Return:
+        Size of saved image
+    Error:
+        RequestError - Raised if received bytes less than content length
+        PlaceholderError - Raised if image is a known placeholder
+    """
+    size = os.path.getsize(part_path)
+    if content_length is not None:
+        expected = content_length + (offset if mode == 'ab' else 0)
+        if size < expected:
+            print('Transfer incomplete: {} of {} bytes'.format(size, expected))
+            raise RequestError('Transfer of image incomplete')
+
+    if placeholders and placeholders.is_placeholder_digest(digest):
+        os.remove(part_path)
+        raise PlaceholderError('Image is a known placeholder')
+
+    os.replace(part_path, file_path)
+    return size
+
+
+
+def _write_chunk(file, hasher, chunk):
+    """
+    Write chunk to file and feed it to hasher
+    """
+    hasher.update(chunk)
+    file.write(chunk)
+
+
+def _part_hasher(part_path, mode):
+    """
+    sha256 object fed with bytes already in .part file when resuming
+    """
+    hasher = hashlib.sha256()
+    if mode == 'ab':
+        with open(part_path, mode='rb') as file:
+            for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+
+    return hasher
 
 
 
@@ -185,6 +820,27 @@ class urlError(Exception):
     pass
 
 
+class PlaceholderError(Exception):
+    """
+    Raise when downloaded image is a known placeholder
+    """
+    pass
+
+
+class RequestError(RuntimeError):
+    """
+    Raise when image request or transfer failed
+
+    Attributes:
+        status - Response status code, None if no usable response
+        retry_after - Seconds from Retry-After header, None if not given
+    """
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
 if __name__ == '__main__':
     # Test extract_images
     urls = extract_images('test.csv')
@@ -8,10 +8,11 @@ Version:
 """
 
 import sys, random
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from pycomic_pkg import http_class as httpcl
+
 
 URL_COMPUTER = 'https://developers.whatismybrowser.com/useragents/explore/hardware_type_specific/computer/'
 URL_PHONE = 'https://developers.whatismybrowser.com/useragents/explore/hardware_type_specific/phone/'
@@ -88,7 +89,7 @@ class UserAgent():
         """
         # Request for web page
         try:
-            req = requests.get(url_type)
+            req = httpcl.client().get(url_type)
             req.raise_for_status()
         except:
             return []
@@ -0,0 +1,38 @@
+"""
+Browserless 999comics chapter decoder against saved chapter pages
+Expected page lists are links csv files in the format written by fetch-url
+"""
+
+import os, csv
+
+import pytest
+
+from pycomic_pkg import exceptions as pycomic_err
+from pycomic_pkg import comic999_decoder as decoder
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+HOST = 'https://www.999comics.com'
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), mode='rt', encoding='utf-8') as file:
+        return file.read()
+
+
+def _links(name):
+    with open(os.path.join(FIXTURES, name), mode='rt', encoding='utf-8') as file:
+        return [row[1] for row in csv.reader(file)]
+
+
+@pytest.mark.parametrize('page, links', [
+    ('999comics_chapter.html', '999comics_chapter_links.csv'),
+    ('999comics_chapter_packed.html', '999comics_chapter_packed_links.csv'),
+])
+def test_chapter_urls_match_links(page, links):
+    assert decoder.chapter_urls(_read(page), HOST) == _links(links)
+
+
+def test_page_without_page_list():
+    with pytest.raises(pycomic_err.DecodeError):
+        decoder.chapter_urls('<html><body>No script</body></html>', HOST)
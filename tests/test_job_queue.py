@@ -0,0 +1,28 @@
+"""
+Run order of persistent chapter download queue
+"""
+
+from pycomic_pkg import job_queue_class as queuecl
+
+
+def test_higher_level_runs_before_lower_level(tmp_path):
+    job_queue = queuecl.JobQueue(str(tmp_path / 'queue.csv'), aging=0)
+    for tag in range(3):
+        job_queue.add('MANHUAGUI', 'backcat', tag, priority=0, pages=10)
+        job_queue.add('MANHUAGUI', 'ongoing', tag, priority=queuecl.ONGOING_PRIORITY, pages=10)
+
+    comics = [job['comic'] for job in job_queue.ordered()]
+
+    assert comics == ['ongoing'] * 3 + ['backcat'] * 3
+
+
+def test_comics_take_turns_within_level(tmp_path):
+    job_queue = queuecl.JobQueue(str(tmp_path / 'queue.csv'), aging=0)
+    for tag in range(2):
+        job_queue.add('MANHUAGUI', 'first', tag, priority=5, pages=10)
+    for tag in range(2):
+        job_queue.add('MANHUAGUI', 'second', tag, priority=5, pages=10)
+
+    order = [(job['comic'], job['tag']) for job in job_queue.ordered()]
+
+    assert order == [('first', 0), ('second', 0), ('first', 1), ('second', 1)]
@@ -0,0 +1,51 @@
+"""
+Browserless manhuagui chapter decoder against saved chapter page
+Expected page list is links csv file in the format written by fetch-url
+"""
+
+import os, csv
+
+import pytest
+
+from pycomic_pkg import exceptions as pycomic_err
+from pycomic_pkg import manhuagui_decoder as decoder
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def _read(name):
+    with open(os.path.join(FIXTURES, name), mode='rt', encoding='utf-8') as file:
+        return file.read()
+
+
+def _links(name):
+    with open(os.path.join(FIXTURES, name), mode='rt', encoding='utf-8') as file:
+        return [row[1] for row in csv.reader(file)]
+
+
+def test_chapter_urls_match_links():
+    assert decoder.chapter_urls(_read('manhuagui_chapter.html')) == _links('manhuagui_chapter_links.csv')
+
+
+def test_image_host_replaced():
+    urls = decoder.chapter_urls(_read('manhuagui_chapter.html'), 'eu.hamreus.com')
+
+    assert urls == [link.replace('i.hamreus.com', 'eu.hamreus.com', 1)
+                    for link in _links('manhuagui_chapter_links.csv')]
+
+
+def test_image_data_fields():
+    data = decoder.image_data(_read('manhuagui_chapter.html'))
+
+    assert data['len'] == len(data['files'])
+    assert set(data['sl']) == {'e', 'm'}
+
+
+@pytest.mark.parametrize('html', [
+    '<html><body>No script</body></html>',
+    "}('0.1(2)',62,3,'AAAA'[",
+])
+def test_page_without_image_data(html):
+    with pytest.raises(pycomic_err.DecodeError):
+        decoder.chapter_urls(html)
@@ -0,0 +1,79 @@
+"""
+Chapter download manifest: csv round trip and rerun of partly downloaded chapter
+"""
+
+import os
+
+import pytest
+
+from pycomic_pkg import manifest_class as manifestcl
+
+
+def _write_page(directory, filename, data):
+    with open(os.path.join(directory, filename), mode='wb') as file:
+        file.write(data)
+
+
+def test_csv_round_trip(tmp_path):
+    path = str(tmp_path / 'manifest' / 'chapter.csv')
+    manifest = manifestcl.Manifest(path)
+    manifest.register([(0, 'https://host/a,1.jpg', '0000.jpg'), (1, 'https://host/b.jpg', '0001.jpg')])
+    manifest.update(0, 'https://host/a,1.jpg', '0000.jpg', manifestcl.COMPLETE, 1234, 'ab' * 32)
+    manifest.update(2, 'https://host/c.jpg', '0002.jpg', manifestcl.PLACEHOLDER)
+    manifest.rename(1, '0001.png')
+
+    loaded = manifestcl.Manifest(path)
+
+    assert loaded.pages == manifest.pages
+    assert loaded.status(0) == manifestcl.COMPLETE
+    assert loaded.filename(1) == '0001.png'
+    assert loaded.failed() == [1, 2]
+    assert loaded.placeholders() == [2]
+    assert not os.path.exists(path + '.tmp')
+
+
+def test_rerun_skips_complete_pages(tmp_path):
+    url = pytest.importorskip('pycomic_pkg.url_collections')
+    directory = str(tmp_path)
+    urls = ['https://host/{}.jpg'.format(index) for index in range(3)]
+    manifest = manifestcl.Manifest(str(tmp_path / 'manifest.csv'))
+
+    assert [page[0] for page in url._plan_pages(urls, directory, manifest)] == [0, 1, 2]
+
+    _write_page(directory, '0000.jpg', b'page')
+    manifest.update(0, urls[0], '0000.jpg', manifestcl.COMPLETE, 4)
+    _write_page(directory, '0001.jpg', b'cut')
+    manifest.update(1, urls[1], '0001.jpg', manifestcl.COMPLETE, 4)
+
+    # Rerun reads manifest from disk, page 1 file does not match recorded size
+    rerun = manifestcl.Manifest(str(tmp_path / 'manifest.csv'))
+
+    assert [page[0] for page in url._plan_pages(urls, directory, rerun)] == [1, 2]
+    assert rerun.is_complete(0, directory)
+    assert not rerun.all_complete(directory, 3)
+
+
+def test_all_complete(tmp_path):
+    directory = str(tmp_path)
+    manifest = manifestcl.Manifest()
+    for index in range(2):
+        _write_page(directory, '{:04}.jpg'.format(index), b'page')
+        manifest.update(index, 'https://host/{}.jpg'.format(index), '{:04}.jpg'.format(index),
+                        manifestcl.COMPLETE, 4)
+
+    assert manifest.all_complete(directory, 2)
+    assert not manifest.all_complete(directory, 3)
+
+
+def test_empty_manifest_is_falsy(tmp_path):
+    # Chapter without manifest file must not be mistaken for one with a manifest
+    manifest = manifestcl.Manifest(str(tmp_path / 'missing.csv'))
+
+    assert len(manifest) == 0
+    assert not manifest
+    assert not os.path.exists(str(tmp_path / 'missing.csv'))
+
+    manifest.register([(0, 'https://host/0.jpg', '0000.jpg')])
+
+    assert len(manifest) == 1
+    assert manifest
@@ -0,0 +1,72 @@
+"""
+Chapter selection of download all-missing for book directories made before manifests
+"""
+
+import os
+
+import pytest
+
+for module in ('requests', 'aiohttp', 'bs4', 'PIL', 'selenium'):
+    pytest.importorskip(module)
+
+from pycomic_pkg import pycomic_lib as pylib
+
+
+class _Config():
+    """
+    Directories of config section under root
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def menu(self, section):
+        return os.path.join(self.root, 'menu')
+
+    def links(self, section):
+        return os.path.join(self.root, 'links')
+
+    def origin(self, section):
+        return os.path.join(self.root, 'origin')
+
+    def manifest(self, section):
+        return os.path.join(self.root, 'manifest')
+
+
+@pytest.fixture
+def legacy_comic(tmp_path):
+    """
+    Chapter 0 downloaded before manifests: book directory has pages, no manifest csv
+    """
+    config = _Config(str(tmp_path))
+    os.makedirs(os.path.join(config.menu(None)))
+    with open(os.path.join(config.menu(None), 'legacy_menu.csv'), mode='wt', encoding='utf-8') as file:
+        file.write('ch1,https://www.manhuagui.com/comic/1/1.html\n')
+
+    os.makedirs(os.path.join(config.links(None), 'legacy'))
+    with open(os.path.join(config.links(None), 'legacy', 'legacy_ch1.csv'), mode='wt', encoding='utf-8') as file:
+        file.write('0,https://i.hamreus.com/ps1/a/001.jpg\n1,https://i.hamreus.com/ps1/a/002.jpg\n')
+
+    book = os.path.join(config.origin(None), 'legacy', 'legacy_ch1')
+    os.makedirs(book)
+    for page in ('001.jpg', '002.jpg'):
+        with open(os.path.join(book, page), mode='wb') as file:
+            file.write(b'\xff\xd8\xff\xd9')
+
+    return config, pylib.Comic('legacy', 'legacy')
+
+
+def test_all_missing_counts_legacy_chapter_as_present(legacy_comic):
+    config, comic = legacy_comic
+
+    tags, chapters, skipped = pylib.prepare_chapters(config, 'MANHUAGUI', comic, [0], missing_only=True)
+
+    assert (tags, chapters, skipped) == ([], [], [])
+
+
+def test_requested_legacy_chapter_is_skipped(legacy_comic):
+    config, comic = legacy_comic
+
+    tags, chapters, skipped = pylib.prepare_chapters(config, 'MANHUAGUI', comic, [0])
+
+    assert (tags, chapters, skipped) == ([], [], [0])
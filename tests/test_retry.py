@@ -0,0 +1,63 @@
+"""
+Retry policy of image requests: status classification, Retry-After and backoff bounds
+"""
+
+import random
+import datetime
+import email.utils
+
+import pytest
+
+from pycomic_pkg import retry_class as retrycl
+
+
+@pytest.mark.parametrize('status', [None, 408, 425, 429, 500, 502, 503, 504, 599])
+def test_transient_status_is_retried(status):
+    assert retrycl.RetryPolicy().is_retryable(status)
+
+
+@pytest.mark.parametrize('status', [400, 401, 403, 404, 410, 451, 600])
+def test_permanent_status_is_not_retried(status):
+    assert not retrycl.RetryPolicy().is_retryable(status)
+
+
+@pytest.mark.parametrize('value, seconds', [('120', 120), ('0', 0), ('-5', 0), ('1.5', 1.5)])
+def test_retry_after_seconds(value, seconds):
+    assert retrycl.parse_retry_after(value) == seconds
+
+
+def test_retry_after_http_date():
+    retry_date = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=90)
+
+    seconds = retrycl.parse_retry_after(email.utils.format_datetime(retry_date, usegmt=True))
+
+    assert 80 <= seconds <= 90
+
+
+def test_retry_after_past_date_waits_nothing():
+    assert retrycl.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0
+
+
+@pytest.mark.parametrize('value', [None, '', 'soon'])
+def test_retry_after_not_usable(value):
+    assert retrycl.parse_retry_after(value) is None
+
+
+def test_delay_within_full_jitter_bounds():
+    random.seed(0)
+    policy = retrycl.RetryPolicy(base=1, cap=60)
+
+    for attempt in range(10):
+        bound = min(60, 2 ** attempt)
+        delays = [policy.delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+        # Full jitter spreads over the whole range, not only near the bound
+        assert min(delays) < bound / 4
+
+    assert max(policy.delay(20) for _ in range(200)) <= 60
+
+
+def test_delay_honors_retry_after():
+    policy = retrycl.RetryPolicy(base=1, cap=4)
+
+    assert all(policy.delay(attempt, retry_after=30) == 30 for attempt in range(5))
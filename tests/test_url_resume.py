@@ -0,0 +1,155 @@
+"""
+Resume of interrupted image download from .part file against local http server
+"""
+
+import os, re
+import hashlib
+import threading
+import http.server
+
+import pytest
+
+for module in ('requests', 'aiohttp', 'yarl'):
+    pytest.importorskip(module)
+
+from pycomic_pkg import url_collections as url
+
+
+# Larger than CHUNK_SIZE so interrupted transfer has chunks written
+IMAGE = bytes(range(256)) * 4096
+DIGEST = hashlib.sha256(IMAGE).hexdigest()
+
+
+class _ImageHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Serve IMAGE, answer of Range request is set by mode of server
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        mode = self.server.mode
+        match = re.match(r'bytes=(\d+)-', self.headers.get('Range') or '')
+        start = int(match.group(1)) if match else 0
+
+        if mode == 'unsatisfied':
+            self.send_response(416)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if mode == 'ignore-range' or not match:
+            body = IMAGE
+            self.send_response(200)
+        else:
+            # Mismatch server answers with range other than the requested one
+            start = 0 if mode == 'mismatch' else start
+            body = IMAGE[start:]
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(start, len(IMAGE) - 1, len(IMAGE)))
+
+        if mode == 'short':
+            # Connection dropped before promised length
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), _ImageHandler)
+    httpd.mode = 'resume'
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _image_url(server):
+    return 'http://127.0.0.1:{}/0001.jpg'.format(server.server_port)
+
+
+def _write_part(file_path, data):
+    with open(file_path + url.PART_SUFFIX, mode='wb') as file:
+        file.write(data)
+
+
+def _read(file_path):
+    with open(file_path, mode='rb') as file:
+        return file.read()
+
+
+def test_range_header_only_when_resuming():
+    header = {'User-Agent': 'pycomic'}
+
+    assert url._range_header(header, 0) == {'User-Agent': 'pycomic', 'Accept-Encoding': 'identity'}
+    assert url._range_header(header, 100)['Range'] == 'bytes=100-'
+    assert header == {'User-Agent': 'pycomic'}
+
+
+def test_partial_content_appends_to_part(server, tmp_path):
+    file_path = str(tmp_path / '0001.jpg')
+    _write_part(file_path, IMAGE[:1000])
+
+    size, digest = url._image_download(_image_url(server), file_path)
+
+    assert (size, digest) == (len(IMAGE), DIGEST)
+    assert _read(file_path) == IMAGE
+    assert not os.path.exists(file_path + url.PART_SUFFIX)
+
+
+def test_whole_image_restarts_part(server, tmp_path):
+    server.mode = 'ignore-range'
+    file_path = str(tmp_path / '0001.jpg')
+    _write_part(file_path, b'stale bytes of other image')
+
+    size, digest = url._image_download(_image_url(server), file_path)
+
+    assert (size, digest) == (len(IMAGE), DIGEST)
+    assert _read(file_path) == IMAGE
+
+
+@pytest.mark.parametrize('mode', ['mismatch', 'unsatisfied'])
+def test_unusable_range_drops_part(server, tmp_path, mode):
+    server.mode = mode
+    file_path = str(tmp_path / '0001.jpg')
+    _write_part(file_path, IMAGE[:1000])
+
+    with pytest.raises(url.RequestError):
+        url._image_download(_image_url(server), file_path)
+
+    assert not os.path.exists(file_path + url.PART_SUFFIX)
+    assert not os.path.exists(file_path)
+
+
+def test_short_body_is_not_renamed(server, tmp_path):
+    server.mode = 'short'
+    file_path = str(tmp_path / '0001.jpg')
+
+    with pytest.raises(url.RequestError):
+        url._image_download(_image_url(server), file_path)
+
+    # Received bytes stay in .part file for next attempt to resume
+    assert not os.path.exists(file_path)
+    received = _read(file_path + url.PART_SUFFIX)
+    assert received and IMAGE.startswith(received)
+
+
+def test_part_finish_checks_content_length(tmp_path):
+    file_path = str(tmp_path / '0001.jpg')
+    _write_part(file_path, IMAGE[:1000])
+
+    with pytest.raises(url.RequestError):
+        url._part_finish(file_path + url.PART_SUFFIX, file_path, 'ab', 500, 1000)
+    assert not os.path.exists(file_path)
+
+    assert url._part_finish(file_path + url.PART_SUFFIX, file_path, 'ab', 500, 500) == 1000
+    assert _read(file_path) == IMAGE[:1000]